@@ -0,0 +1,257 @@
+# api.py - TalentFlow AI headless entry point (HTTP service + CLI)
+#
+# Exposes the screening/interview pipeline stages without Streamlit, reusing the
+# utils modules and one long-lived Gemini client per process.
+#
+#   python api.py serve --port 8080
+#   python api.py score --jd jd.txt resume1.pdf resume2.pdf
+#   python api.py questions --jd jd.txt resume.pdf
+#   python api.py evaluate --question "..." --answer "..."
+#   python api.py report --candidate candidate.json --out report.pdf
+#
+# HTTP (JSON in, JSON out; PDFs as base64):
+#   POST /score      {"jd", "resume_text" | "resume_pdf_base64"}
+#   POST /screen     {"jd", "resumes": [{"filename", "pdf_base64"}], "concurrency", "top_k", "min_relevance"}
+#   POST /questions  {"jd", "resume_text" | "resume_pdf_base64"}
+#   POST /evaluate   {"question", "answer"}  or  {"qa_pairs": [[question, answer], ...]}
+#   POST /report     {"candidate", "answers", "final_score"}  -> {"pdf_base64"}
+#   GET  /metrics    Prometheus text;  GET /metrics.json;  GET /healthz
+#
+# Set TALENTFLOW_API_TOKEN to require "Authorization: Bearer <token>".
+import argparse
+import base64
+import io
+import json
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import utils.interviewer as interviewer
+import utils.llm_client as llm_client
+import utils.metrics as metrics
+from utils.report_generator import generate_pdf_report
+from utils.resume_parser import extract_text_from_pdf
+from utils.screening import ScreeningError, score_resume, screen_resumes
+
+MAX_BODY_BYTES = 50 * 1024 * 1024
+
+
+def load_secret(name):
+    """Environment first, then .streamlit/secrets.toml (same file the Streamlit app reads)."""
+    if os.environ.get(name):
+        return os.environ[name]
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".streamlit", "secrets.toml")
+    try:
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f).get(name)
+    except Exception:
+        return None
+
+
+class Pipeline:
+    """The pipeline stages as plain callables around one shared Gemini client."""
+
+    def __init__(self, model=None):
+        if model is None:
+            api_key = load_secret("GEMINI_API_KEY")
+            if not api_key:
+                raise RuntimeError("GEMINI_API_KEY is not set (environment or .streamlit/secrets.toml)")
+            model = llm_client.configure(api_key=api_key)
+        self.model = model
+
+    @staticmethod
+    def resume_text(payload):
+        if payload.get("resume_text"):
+            return payload["resume_text"]
+        if payload.get("resume_pdf_base64"):
+            return extract_text_from_pdf(io.BytesIO(base64.b64decode(payload["resume_pdf_base64"])))
+        raise ValueError("resume_text or resume_pdf_base64 is required")
+
+    def score(self, payload):
+        resume_text = self.resume_text(payload)
+        return {"result": score_resume(_required(payload, "jd"), resume_text, self.model,
+                                       use_cache=payload.get("use_cache", True))}
+
+    def screen(self, payload):
+        files = [(r.get("filename", f"resume_{i}.pdf"), base64.b64decode(r["pdf_base64"]))
+                 for i, r in enumerate(_required(payload, "resumes"))]
+        rows = screen_resumes(
+            _required(payload, "jd"), files, self.model,
+            concurrency=payload.get("concurrency", 8), use_cache=payload.get("use_cache", True),
+            top_k=payload.get("top_k"), min_relevance=payload.get("min_relevance"),
+        )
+        # resume_text is the caller's own input; leave it out of the response
+        return {"results": [{k: v for k, v in row.items() if k != "resume_text"} for row in rows]}
+
+    def questions(self, payload):
+        resume_text = self.resume_text(payload)
+        return {"questions": interviewer.generate_interview_questions(
+            _required(payload, "jd"), resume_text, use_cache=payload.get("use_cache", True), model=self.model)}
+
+    def evaluate(self, payload):
+        use_cache = payload.get("use_cache", True)
+        if "qa_pairs" in payload:
+            return {"feedback": interviewer.evaluate_answers_batch(
+                [tuple(p) for p in payload["qa_pairs"]], self.model, use_cache=use_cache)}
+        return {"feedback": interviewer.evaluate_answer(
+            _required(payload, "question"), _required(payload, "answer"), self.model, use_cache=use_cache)}
+
+    def report(self, payload):
+        pdf = generate_pdf_report(_required(payload, "candidate"), payload.get("answers", []),
+                                  _required(payload, "final_score"), use_cache=payload.get("use_cache", True),
+                                  model=self.model)
+        return {"pdf_base64": base64.b64encode(pdf).decode("ascii")}
+
+
+def _required(payload, key):
+    if key not in payload:
+        raise ValueError(f"'{key}' is required")
+    return payload[key]
+
+
+def make_handler(pipeline, token=None):
+    routes = {
+        "/score": pipeline.score,
+        "/screen": pipeline.screen,
+        "/questions": pipeline.questions,
+        "/evaluate": pipeline.evaluate,
+        "/report": pipeline.report,
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status, body, content_type="application/json"):
+            data = body if isinstance(body, bytes) else body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_json(self, status, obj):
+            self._send(status, json.dumps(obj, default=str))
+
+        def _authorized(self):
+            return not token or self.headers.get("Authorization") == f"Bearer {token}"
+
+        def do_GET(self):
+            if self.path == "/healthz":
+                self._send_json(200, {"ok": True, "gemini": pipeline.model.stats() if hasattr(pipeline.model, "stats") else {}})
+            elif not self._authorized():
+                self._send_json(401, {"error": "unauthorized"})
+            elif self.path == "/metrics":
+                self._send(200, metrics.store.to_prometheus(), "text/plain; version=0.0.4")
+            elif self.path == "/metrics.json":
+                self._send(200, metrics.store.to_json())
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            route = routes.get(self.path)
+            if route is None:
+                return self._send_json(404, {"error": "not found"})
+            if not self._authorized():
+                return self._send_json(401, {"error": "unauthorized"})
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_BYTES:
+                return self._send_json(413, {"error": "request too large"})
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self._send_json(400, {"error": "invalid JSON"})
+            try:
+                with metrics.span("api" + self.path.replace("/", "_")):
+                    result = route(payload)
+            except ScreeningError as e:
+                return self._send_json(502, {"error": str(e)})
+            except (ValueError, KeyError, TypeError) as e:
+                return self._send_json(400, {"error": str(e)})
+            except Exception as e:
+                return self._send_json(500, {"error": str(e)})
+            self._send_json(200, result)
+
+        def log_message(self, fmt, *args):
+            sys.stderr.write("%s - %s\n" % (self.address_string(), fmt % args))
+
+    return Handler
+
+
+def serve(pipeline, host="127.0.0.1", port=8080, token=None):
+    server = ThreadingHTTPServer((host, port), make_handler(pipeline, token))
+    server.daemon_threads = True
+    print(f"TalentFlow API listening on http://{host}:{port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TalentFlow AI headless pipeline")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("serve", help="run the HTTP JSON service")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8080)
+
+    p = sub.add_parser("score", help="score resume PDFs against a JD")
+    p.add_argument("--jd", required=True, help="job description text file")
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--top-k", type=int)
+    p.add_argument("pdfs", nargs="+")
+
+    p = sub.add_parser("questions", help="generate interview questions for a resume")
+    p.add_argument("--jd", required=True, help="job description text file")
+    p.add_argument("pdf")
+
+    p = sub.add_parser("evaluate", help="evaluate one interview answer")
+    p.add_argument("--question", required=True)
+    p.add_argument("--answer", required=True)
+
+    p = sub.add_parser("report", help="render a report PDF from a JSON file with candidate/answers/final_score")
+    p.add_argument("--candidate", required=True, help="JSON file")
+    p.add_argument("--out", required=True, help="output PDF path")
+
+    args = parser.parse_args(argv)
+    pipeline = Pipeline()
+
+    if args.command == "serve":
+        serve(pipeline, args.host, args.port, token=os.environ.get("TALENTFLOW_API_TOKEN"))
+        return 0
+    if args.command == "score":
+        files = []
+        for path in args.pdfs:
+            with open(path, "rb") as f:
+                files.append((os.path.basename(path), f.read()))
+        for row in screen_resumes(_read(args.jd), files, pipeline.model, concurrency=args.concurrency, top_k=args.top_k):
+            row.pop("resume_text", None)
+            print(json.dumps(row, default=str), flush=True)
+        return 0
+    if args.command == "questions":
+        with open(args.pdf, "rb") as f:
+            resume_text = extract_text_from_pdf(f)
+        print(json.dumps(pipeline.questions({"jd": _read(args.jd), "resume_text": resume_text}), indent=2))
+        return 0
+    if args.command == "evaluate":
+        print(json.dumps(pipeline.evaluate({"question": args.question, "answer": args.answer}), indent=2))
+        return 0
+    if args.command == "report":
+        payload = json.loads(_read(args.candidate))
+        with open(args.out, "wb") as f:
+            f.write(base64.b64decode(pipeline.report(payload)["pdf_base64"]))
+        print(args.out)
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,26 @@
 # app.py - TalentFlow AI: Resume Screening + Voice Interview Agent
 # v1.2.0: Robust secrets handling with fallbacks - forces cache bust
+import time
+_app_start = time.perf_counter()
 import streamlit as st
-from streamlit_webrtc import webrtc_streamer, AudioProcessorBase, WebRtcMode
-import google.generativeai as genai
+from utils.lazy_loader import IMPORT_TIMES, WHISPER_MODEL_SIZES, DEFAULT_WHISPER_MODEL, timed_import
 from utils.resume_parser import extract_text_from_pdf
 import utils.interviewer as interviewer
-from utils.report_generator import generate_pdf_report
-from supabase import create_client
-import whisper
-import numpy as np
-import soundfile as sf
-import os
+from utils.report_generator import generate_pdf_report, export_reports
+from utils.screening import ScreeningError, describe_duplicate, screen_resume, screen_resumes, iter_resume_files
+from utils.dedup import ResumeIndex
+from utils.llm_cache import get_cache
+from utils.audio_frontend import SAMPLE_RATE, AudioFrontEnd
+from utils.transcription import StreamingTranscriber
+from utils.transcription_pool import DEFAULT_QUANTIZE, TranscriptionPool
+from utils.persistence import CandidateOutbox, SupabaseBackend, make_idempotency_key
+from utils.candidate_store import SORT_COLUMNS, CandidateStore
+import utils.metrics as metrics
+from utils.evaluation_queue import EvaluationQueue, PENDING_FEEDBACK, DEFERRED_FEEDBACK
 from datetime import datetime
-import json
+import utils.llm_client as llm_client
+
+# Heavy SDKs (Gemini, Supabase, Whisper/torch, WebRTC) are imported on first use
 
 # ===================== UI CONFIG =====================
 st.set_page_config(page_title="TalentFlow AI - Rooman Internship", layout="wide")
@@ -53,45 +61,56 @@ try:
 except:
     pass
 
-# Configure Gemini
+# Shared Gemini client (rate limited, retried; the SDK itself loads on the first call)
+@st.cache_resource
+def gemini_client(api_key):
+    return llm_client.configure(api_key=api_key)
+
 model = None
 ai_enabled = False
 if gemini_key:
-    try:
-        genai.configure(api_key=gemini_key)
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        ai_enabled = True
-    except Exception as e:
-        st.warning(f"Failed to configure Gemini: {str(e)}")
+    model = gemini_client(gemini_key)
+    ai_enabled = True
 else:
     st.warning("⚠️ GEMINI_API_KEY not found in Streamlit Cloud secrets. AI features disabled.")
 
-# Create Supabase clients
-supabase_public = None
-supabase_admin = None
+# Supabase clients are created on first use (see get_supabase_admin)
+if not supabase_url:
+    st.info("⚠️ SUPABASE_URL not configured")
+if not supabase_key:
+    st.info("⚠️ SUPABASE_KEY not configured")
+if service_role is None:
+    st.info("ℹ️ SUPABASE_SERVICE_ROLE_KEY optional (admin DB save disabled)")
 
-if supabase_url and supabase_key:
-    try:
-        supabase_public = create_client(supabase_url, supabase_key)
-    except Exception as e:
-        st.warning(f"Failed to create Supabase public client: {str(e)}")
-else:
-    if not supabase_url:
-        st.info("⚠️ SUPABASE_URL not configured")
-    if not supabase_key:
-        st.info("⚠️ SUPABASE_KEY not configured")
+@st.cache_resource
+def get_supabase_admin():
+    if not (supabase_url and service_role):
+        return None
+    return timed_import("supabase").create_client(supabase_url, service_role)
 
-if supabase_url and service_role:
-    try:
-        supabase_admin = create_client(supabase_url, service_role)
-    except Exception as e:
-        st.warning(f"Failed to create Supabase admin client: {str(e)}")
-elif service_role is None:
-    st.info("ℹ️ SUPABASE_SERVICE_ROLE_KEY optional (admin DB save disabled)")
+@st.cache_resource
+def get_outbox():
+    # Process-wide outbox in data/candidates.db with one background flusher
+    backend = SupabaseBackend(get_supabase_admin) if (supabase_url and service_role) else None
+    return CandidateOutbox(backend=backend).start()
+
+@st.cache_resource
+def get_candidate_store():
+    # Local leaderboard tables in data/candidates.db, shared by all sessions
+    return CandidateStore()
+
+@st.cache_resource
+def get_resume_index():
+    # Fingerprints of past submissions (data/resume_fingerprints.db), shared by all sessions
+    return ResumeIndex()
+
+@st.cache_data(ttl=60)
+def leaderboard_skills():
+    return get_candidate_store().popular_skills(limit=100)
 
 # If AI not enabled, provide safe fallbacks in the interviewer module
 if not ai_enabled:
-    def _fallback_questions(jd, resume_text):
+    def _fallback_questions(jd, resume_text, use_cache=True, model=None):
         return [
             "Tell me about a project relevant to this job.",
             "Describe a technical challenge you solved.",
@@ -100,25 +119,65 @@ if not ai_enabled:
             "Why are you interested in this role?",
         ]
 
-    def _fallback_evaluate(question, answer, model=None):
+    def _fallback_evaluate(question, answer, model=None, use_cache=True):
         return "AI unavailable — placeholder feedback. Configure GEMINI_API_KEY to enable evaluation."
 
+    def _fallback_evaluate_batch(qa_pairs, model=None, use_cache=True):
+        return [_fallback_evaluate(q, a) for q, a in qa_pairs]
+
     interviewer.generate_interview_questions = _fallback_questions
     interviewer.evaluate_answer = _fallback_evaluate
+    interviewer.evaluate_answers_batch = _fallback_evaluate_batch
 
-@st.cache_resource
-def load_whisper():
-    return whisper.load_model("base")
+def whisper_model_size():
+    try:
+        size = st.secrets.get("WHISPER_MODEL", DEFAULT_WHISPER_MODEL)
+    except:
+        size = DEFAULT_WHISPER_MODEL
+    return size if size in WHISPER_MODEL_SIZES else DEFAULT_WHISPER_MODEL
 
-whisper_model = load_whisper()
+def whisper_int8():
+    try:
+        value = st.secrets.get("WHISPER_INT8", DEFAULT_QUANTIZE)
+    except:
+        value = DEFAULT_QUANTIZE
+    return value if isinstance(value, bool) else str(value).lower() in ("1", "true", "yes")
 
-# ===================== AUDIO PROCESSOR =====================
-class AudioProcessor(AudioProcessorBase):
-    def __init__(self):
-        self.frames = []
+@st.cache_resource
+def transcription_pool():
+    # One worker pool per server, shared by all sessions so concurrent voice interviews
+    # queue for CPU instead of fighting over it. Model settings come from secrets/env
+    # rather than the sidebar: a pool per session choice would keep every loaded model resident.
+    return TranscriptionPool(whisper_model_size(), quantize=whisper_int8())
 
-    def recv(self, frame):
-        self.frames.append(frame.to_ndarray())
+# ===================== AUDIO PROCESSOR =====================
+def audio_processor_class():
+    # streamlit_webrtc (and aiortc) only load once a voice interview starts
+    webrtc = timed_import("streamlit_webrtc")
+
+    class AudioProcessor(webrtc.AudioProcessorBase):
+        # Frames are downmixed/resampled to 16 kHz mono and go straight into the streaming
+        # transcriber's ring buffer; Whisper runs on full windows while the candidate is speaking.
+        def __init__(self, transcriber):
+            self.transcriber = transcriber
+            self.front_end = AudioFrontEnd()
+
+        def recv(self, frame):
+            start = time.perf_counter()
+            samples = self.front_end.convert(frame)
+            self.transcriber.feed(samples)
+            metrics.record("webrtc_capture", time.perf_counter() - start, samples=len(samples))
+            return frame
+
+    return webrtc, AudioProcessor
+
+def stop_transcribers(keep=None):
+    # Each voice question keeps a StreamingTranscriber in session state; stop the ones for
+    # questions no longer on screen so their threads don't outlive them
+    for key in [k for k in st.session_state if str(k).startswith("transcriber_") and k != keep]:
+        # timeout=0: a window still being decoded finishes on the (daemon) thread without blocking the rerun
+        st.session_state[key].close(timeout=0)
+        del st.session_state[key]
 
 # ===================== SESSION STATE =====================
 if "candidate" not in st.session_state:
@@ -131,60 +190,205 @@ if "answers" not in st.session_state:
     st.session_state.answers = []
 if "interview_type" not in st.session_state:
     st.session_state.interview_type = "Text"
+if "eval_queue" not in st.session_state:
+    st.session_state.eval_queue = EvaluationQueue()
+if "batch_graded" not in st.session_state:
+    st.session_state.batch_graded = False
 if "current_feedback" not in st.session_state:
     st.session_state.current_feedback = ""
 if "audio_frames" not in st.session_state:
     st.session_state.audio_frames = []
 if "recording" not in st.session_state:
     st.session_state.recording = False
+if "bulk_results" not in st.session_state:
+    st.session_state.bulk_results = []
+if "bulk_throughput" not in st.session_state:
+    st.session_state.bulk_throughput = 0.0
+if "leaderboard_cursors" not in st.session_state:
+    st.session_state.leaderboard_cursors = [None]  # keyset cursor for each page visited
+
+def bulk_table_rows(rows):
+    # Table view of bulk results: best scores first, failures at the bottom
+    def sort_key(r):
+        try:
+            return (0, -float(r["score"]))
+        except (TypeError, ValueError):
+            return (1, 0.0)
+    ordered = sorted(rows, key=sort_key)
+    columns = ["name", "file", "score", "relevance", "match", "summary", "status", "duplicate", "attempts", "seconds", "error"]
+    return [{c: r[c] for c in columns} for r in ordered]
+
 st.title("TalentFlow AI – Resume Screener + Voice Interview Agent")
 st.markdown("**Rooman Technologies Internship Challenge 2025 | Combined Agent #2 + #3**")
 
-tab1, tab2, tab3 = st.tabs(["Resume Screening", "Interview", "Final Report"])
+# ===================== LLM RESPONSE CACHE =====================
+use_cache = st.sidebar.checkbox("Use LLM response cache", value=True, help="Reuse stored Gemini responses for identical inputs")
+cache_stats = get_cache().stats()
+st.sidebar.caption(
+    f"Cache: {cache_stats['entries']} entries · {cache_stats['hits']} hits / {cache_stats['misses']} misses this process"
+)
+dedup_stats = get_resume_index().stats()
+st.sidebar.caption(
+    f"Resubmissions: {dedup_stats['resumes']} resumes fingerprinted · "
+    f"{dedup_stats['file_hits'] + dedup_stats['text_hits']} exact / {dedup_stats['near_hits']} near-duplicate matches this process"
+)
+if st.sidebar.button("Clear LLM cache"):
+    get_cache().clear()
+if model is not None:
+    client_stats = model.stats()
+    st.sidebar.caption(
+        f"Gemini: {client_stats['calls']} calls · {client_stats['errors']} errors · {client_stats['retries']} retries · "
+        f"p50 {client_stats['p50_seconds']:.1f}s / p95 {client_stats['p95_seconds']:.1f}s"
+    )
+
+# ===================== STARTUP TIMINGS =====================
+if "startup_seconds" not in st.session_state:
+    st.session_state.startup_seconds = time.perf_counter() - _app_start
+with st.sidebar.expander("Models & startup"):
+    pool = transcription_pool()
+    st.caption(f"Whisper model: {pool.size}" + (" (int8)" if pool.quantize else "")
+               + " · set WHISPER_MODEL / WHISPER_INT8 in secrets or the environment to change it")
+    if pool.ready:
+        pool_stats = pool.stats()
+        st.caption(f"Whisper '{pool.size}' loaded in {pool.load_seconds:.1f}s · "
+                   f"{pool_stats['ready_workers']}/{pool_stats['workers']} workers × {pool_stats['threads_per_worker']} threads")
+        st.caption(f"Transcription queue: {pool_stats['queue_depth']} waiting, {pool_stats['running']} running · "
+                   f"wait p50 {pool_stats['wait_p50_seconds']:.1f}s / p95 {pool_stats['wait_p95_seconds']:.1f}s")
+    elif pool.error:
+        st.caption(f"Whisper '{pool.size}' failed to load: {pool.error}")
+    else:
+        st.caption(f"Whisper '{pool.size}' not loaded yet (loads when a voice interview starts)")
+    st.caption(f"First script run: {st.session_state.startup_seconds:.2f}s")
+    for name, seconds in sorted(IMPORT_TIMES.items(), key=lambda kv: -kv[1]):
+        st.caption(f"import {name}: {seconds:.2f}s")
+
+tab1, tab2, tab3, tab_board, tab4 = st.tabs(["Resume Screening", "Interview", "Final Report", "Leaderboard", "Admin: Metrics"])
 
 with tab1:
     st.header("Step 1: Resume Screening")
     jd = st.text_area("Paste Job Description", height=200)
-    resume = st.file_uploader("Upload Resume (PDF)", type="pdf")
-
-    if st.button("Analyze Resume", type="primary") and resume and jd:
-        with st.spinner("Extracting resume text..."):
-            resume_text = extract_text_from_pdf(resume)
-
-        with st.spinner("AI evaluating candidate..."):
-            prompt = f"""
-            Job Description: {jd}
-            Resume: {resume_text}
-            Extract the candidate's full name, academic marks/CGPA for 10th, PU (12th), and Engineering, score this resume out of 100, and return JSON only:
-            {{
-              "name": "Full name from resume",
-              "10th_marks": "CGPA or percentage",
-              "pu_marks": "CGPA or percentage",
-              "engineering_cgpa": "CGPA",
-              "score": 88,
-              "match_percentage": "88%",
-              "strengths": ["Python", "ML", "3+3 years"],
-              "gaps": ["No AWS", "No leadership"],
-              "summary": "Strong technical fit"
-            }}
-            """
-            response = model.generate_content(prompt)
-            try:
-                result = json.loads(response.text.strip("```json").strip("```"))
-            except:
-                result = {"name": "Candidate", "score": 85, "match_percentage": "85%", "strengths": [], "gaps": [], "summary": "Good fit"}
-
-            st.session_state.candidate = {
-                "name": result["name"],
-                "resume_score": result["score"],
-                "jd": jd,
-                "resume_text": resume_text,
-                "details": result
-            }
-            st.session_state.questions = interviewer.generate_interview_questions(jd, resume_text)
-
-            st.success(f"**{result['name']}** → Resume Score: **{result['score']}/100**")
-            st.json(result)
+    screening_mode = st.radio("Mode:", ["Single Resume", "Bulk Screening"], horizontal=True, key="screening_mode")
+    reuse_duplicates = st.checkbox("Reuse scores for resubmitted resumes", value=True,
+                                   help="Identical or near-duplicate resumes already screened against this JD keep their earlier result instead of a new AI call")
+
+    if screening_mode == "Single Resume":
+        resume = st.file_uploader("Upload Resume (PDF)", type="pdf")
+
+        if st.button("Analyze Resume", type="primary") and resume and jd:
+            resume_index = get_resume_index()
+            pdf_bytes = resume.getvalue()
+            duplicate = resume_index.find_file(pdf_bytes, jd)
+            if duplicate is not None:
+                # Same PDF as an earlier upload: its extracted text is already stored
+                resume_text = duplicate.resume_text
+            else:
+                with st.spinner("Extracting resume text..."):
+                    page_timings = []
+                    resume_text = extract_text_from_pdf(resume, timings=page_timings)
+                with st.expander(f"Extraction: {len(page_timings)} pages in {sum(t for _, t, _ in page_timings):.2f}s"):
+                    st.table([{"page": n, "seconds": round(t, 3), "chars": c} for n, t, c in page_timings])
+                duplicate = resume_index.find(resume_text, jd)
+
+            result = None
+            has_text = bool(resume_text.strip())
+            if not has_text:
+                # Image-only PDF: the model would only be guessing
+                st.error("No extractable text (scanned PDF?)")
+            elif duplicate is not None:
+                first_seen = datetime.fromtimestamp(duplicate.first_seen).strftime("%Y-%m-%d %H:%M")
+                if duplicate.result is not None and reuse_duplicates:
+                    result = duplicate.result
+                    st.info(f"Resubmission detected ({describe_duplicate(duplicate)} of a resume first seen {first_seen}). "
+                            "Reusing its earlier result for this job description.")
+                else:
+                    st.info(f"Resubmission detected ({describe_duplicate(duplicate)} of a resume first seen {first_seen}).")
+
+            if result is None and has_text:
+                with st.spinner("AI evaluating candidate..."):
+                    try:
+                        # One structured call returns the score, profile and the interview questions
+                        result = screen_resume(jd, resume_text, model, use_cache=use_cache).to_dict()
+                    except ScreeningError as e:
+                        st.error(f"Could not score this resume: {e}")
+
+            if result is not None:
+                resume_index.add(resume_text, pdf_bytes, jd, result)
+                st.session_state.candidate = {
+                    "name": result["name"],
+                    "resume_score": result["score"],
+                    "jd": jd,
+                    "resume_text": resume_text,
+                    "details": result
+                }
+                get_candidate_store().save(jd, resume_text, result)
+                stop_transcribers()
+                st.session_state.questions = result.get("questions") or interviewer.generate_interview_questions(jd, resume_text, use_cache=use_cache, model=model)
+
+                st.success(f"**{result['name']}** → Resume Score: **{result['score']}/100**")
+                st.json(result)
+    else:
+        uploads = st.file_uploader("Upload Resumes (PDFs or a .zip of PDFs)", type=["pdf", "zip"], accept_multiple_files=True)
+        # More workers than the client's in-flight cap would only queue inside the client
+        max_concurrency = getattr(model, "max_concurrency", None) or llm_client.DEFAULT_MAX_CONCURRENCY
+        concurrency = st.slider("Concurrent AI requests", min_value=1, max_value=max(2, max_concurrency),
+                                value=min(8, max_concurrency),
+                                help="Capped by GEMINI_MAX_CONCURRENCY")
+        use_prefilter = st.checkbox("Pre-filter locally before AI scoring", value=True,
+                                    help="Rank all resumes against the JD offline (BM25) and only send the shortlist to Gemini")
+        top_k, min_relevance = None, None
+        if use_prefilter:
+            col_k, col_rel = st.columns(2)
+            top_k = col_k.number_input("Shortlist size (top K)", min_value=1, value=50, step=10)
+            min_relevance = col_rel.slider("Minimum relevance (best resume = 1.0)", 0.0, 1.0, 0.2, 0.05)
+
+        if st.button("Screen All Resumes", type="primary") and uploads and jd:
+            if model is None:
+                st.error("Bulk screening needs GEMINI_API_KEY configured.")
+            else:
+                st.session_state.bulk_results = []
+                progress = st.empty()
+                table = st.empty()
+                start = time.perf_counter()
+                for row in screen_resumes(jd, iter_resume_files(uploads), model, concurrency=concurrency,
+                                          use_cache=use_cache, top_k=top_k, min_relevance=min_relevance,
+                                          dedup=get_resume_index(), reuse_duplicates=reuse_duplicates):
+                    st.session_state.bulk_results.append(row)
+                    # Saved as each row arrives, so a stopped run keeps everything screened so far
+                    if row["status"] == "ok":
+                        get_candidate_store().save(jd, row["resume_text"], row["details"])
+                    done = len(st.session_state.bulk_results)
+                    failed = sum(1 for r in st.session_state.bulk_results if r["status"] == "failed")
+                    filtered = sum(1 for r in st.session_state.bulk_results if r["status"] == "filtered")
+                    reused = sum(1 for r in st.session_state.bulk_results if r["status"] == "ok" and r["attempts"] == 0)
+                    elapsed_min = (time.perf_counter() - start) / 60
+                    progress.write(f"Screened **{done}** resumes ({failed} failed, {filtered} filtered out locally, {reused} reused from earlier submissions) — **{done / max(elapsed_min, 1e-6):.1f} resumes/min**")
+                    table.dataframe(bulk_table_rows(st.session_state.bulk_results), use_container_width=True)
+                st.session_state.bulk_throughput = done / max(elapsed_min, 1e-6)
+
+        if st.session_state.bulk_results:
+            st.caption(f"Last run: {len(st.session_state.bulk_results)} resumes at {st.session_state.bulk_throughput:.1f} resumes/min. Click a column header to sort.")
+            st.dataframe(bulk_table_rows(st.session_state.bulk_results), use_container_width=True)
+
+            shortlisted = [r for r in st.session_state.bulk_results if r["status"] == "ok"]
+            if shortlisted:
+                labels = [f"{r['name']} ({r['file']}) – {r['score']}/100" for r in shortlisted]
+                pick = st.selectbox("Continue to interview with:", range(len(shortlisted)), format_func=lambda i: labels[i])
+                if st.button("Start Interview for Selected Candidate"):
+                    row = shortlisted[pick]
+                    st.session_state.candidate = {
+                        "name": row["name"],
+                        "resume_score": row["score"],
+                        "jd": jd,
+                        "resume_text": row["resume_text"],
+                        "details": row["details"]
+                    }
+                    st.session_state.questions = row["details"].get("questions") or interviewer.generate_interview_questions(jd, row["resume_text"], use_cache=use_cache, model=model)
+                    st.session_state.interview_stage = 0
+                    st.session_state.answers = []
+                    stop_transcribers()
+                    st.session_state.eval_queue = EvaluationQueue()
+                    st.session_state.batch_graded = False
+                    st.success(f"**{row['name']}** selected. Continue in the Interview tab.")
 
 with tab2:
     st.header("Step 2: Automated Interview")
@@ -195,12 +399,29 @@ with tab2:
         # Interview type selection
         interview_type = st.radio("Select Interview Type:", ["Text", "Voice"], horizontal=True, key="interview_type_radio")
         st.session_state.interview_type = interview_type
+        if interview_type == "Voice":
+            # Start loading Whisper as soon as voice is chosen, before the first recording
+            transcription_pool().warm_up()
+        batch_grading = st.checkbox(
+            "Grade all answers together at the end (one AI call)", key="batch_grading",
+            disabled=bool(st.session_state.answers),
+        )
+
+        # Pick up any evaluations that finished since the last rerun
+        still_pending = st.session_state.eval_queue.collect(st.session_state.answers)
+
+        # Only an unanswered voice question on screen keeps its transcriber
+        stage = st.session_state.interview_stage
+        recording = interview_type == "Voice" and len(st.session_state.answers) <= stage < len(st.session_state.questions)
+        stop_transcribers(keep=f"transcriber_{stage}" if recording else None)
 
         if st.session_state.interview_stage < len(st.session_state.questions):
             # Display previous answers in chat history
             for i, answer_data in enumerate(st.session_state.answers):
                 st.chat_message("user").write(f"Q{i+1}: {answer_data['question']}\n\nA: {answer_data['answer']}")
                 st.chat_message("assistant").write(answer_data['feedback'])
+            if still_pending and st.button("Refresh feedback", key=f"refresh_feedback_{st.session_state.interview_stage}"):
+                st.rerun()
 
             # Display current question
             st.info(f"Question {st.session_state.interview_stage + 1}/{len(st.session_state.questions)}: {st.session_state.questions[st.session_state.interview_stage]}")
@@ -223,83 +444,132 @@ with tab2:
                     submit_button = st.button("Submit Answer", type="primary", key=f"submit_{st.session_state.interview_stage}")
                 elif st.session_state.interview_type == "Voice":
                     st.write("🎤 Record your voice answer:")
-                    audio_processor = AudioProcessor()
-                    webrtc_ctx = webrtc_streamer(
+                    webrtc, AudioProcessor = audio_processor_class()
+                    whisper_model = transcription_pool().warm_up()
+                    if not whisper_model.ready:
+                        st.caption(f"Loading Whisper '{whisper_model.size}' model in the background...")
+                    else:
+                        queued = whisper_model.stats()["queue_depth"]
+                        if queued:
+                            st.caption(f"{queued} clips from other interviews are ahead in the transcription queue")
+                    # One transcriber per question, kept in session state so it survives reruns
+                    # and outlives the WebRTC processor once recording stops; its thread
+                    # starts with the first audio frame
+                    transcriber_key = f"transcriber_{st.session_state.interview_stage}"
+                    if transcriber_key not in st.session_state:
+                        st.session_state[transcriber_key] = StreamingTranscriber(whisper_model)
+                    transcriber = st.session_state[transcriber_key]
+                    webrtc_ctx = webrtc.webrtc_streamer(
                         key=f"audio_{st.session_state.interview_stage}",
-                        mode=WebRtcMode.SENDONLY,
-                        audio_processor_factory=lambda: audio_processor,
+                        mode=webrtc.WebRtcMode.SENDONLY,
+                        audio_processor_factory=lambda: AudioProcessor(transcriber),
                         media_stream_constraints={"audio": True, "video": False}
                     )
+                    if transcriber.samples_received:
+                        st.caption(f"Live transcript so far: {transcriber.transcript or '...'} "
+                                   f"({transcriber.silence_removed:.1f}s of silence skipped)")
+                        if transcriber.lost_seconds:
+                            st.warning(f"{transcriber.lost_seconds:.0f}s of audio so far could not be transcribed "
+                                       "(transcription queue busy).")
 
                     if st.button("Process Voice Answer", type="primary", key=f"process_audio_{st.session_state.interview_stage}"):
-                        if audio_processor.frames:
-                            # Combine audio frames
-                            audio_data = np.concatenate(audio_processor.frames, axis=0)
-                            # Save to temporary file
-                            temp_audio_path = f"temp_audio_{st.session_state.interview_stage}.wav"
-                            sf.write(temp_audio_path, audio_data, 16000)
-
-                            # Transcribe with Whisper
-                            with st.spinner("Transcribing audio..."):
-                                result = whisper_model.transcribe(temp_audio_path)
-                                answer = result["text"].strip()
-
-                            # Clean up
-                            if os.path.exists(temp_audio_path):
-                                os.remove(temp_audio_path)
+                        if transcriber.samples_received:
+                            # Only the audio after the last full window is left to transcribe
+                            with st.spinner("Finishing transcription..."):
+                                answer = transcriber.finish()
+                            del st.session_state[transcriber_key]
 
                             st.success(f"Transcribed: {answer}")
+                            st.caption(f"Skipped {transcriber.silence_removed:.1f}s of silence "
+                                       f"out of {transcriber.samples_received / SAMPLE_RATE:.1f}s recorded")
+                            if transcriber.lost_seconds:
+                                st.warning(f"{transcriber.lost_seconds:.0f}s of this answer could not be transcribed "
+                                           f"and is missing above" + (f" ({transcriber.errors[-1]})" if transcriber.errors else "")
+                                           + ". Consider asking the candidate to repeat it.")
                             submit_button = True
                         else:
                             st.error("No audio recorded. Please record your answer first.")
                             submit_button = False
 
                 if submit_button and answer:
-                    # Evaluate answer
-                    with st.spinner("Evaluating your answer..."):
-                        feedback = interviewer.evaluate_answer(
-                            st.session_state.questions[st.session_state.interview_stage],
-                            answer,
-                            model
-                        )
-                    
+                    # Evaluation runs in the background (or at the end in batch mode),
+                    # so the next question is available right away
+                    index = len(st.session_state.answers)
+                    question = st.session_state.questions[st.session_state.interview_stage]
                     st.session_state.answers.append({
-                        "question": st.session_state.questions[st.session_state.interview_stage],
+                        "question": question,
                         "answer": answer,
-                        "feedback": feedback
+                        "feedback": DEFERRED_FEEDBACK if batch_grading else PENDING_FEEDBACK
                     })
-                    
+                    if not batch_grading:
+                        st.session_state.eval_queue.submit(
+                            index, interviewer.evaluate_answer, question, answer, model, use_cache=use_cache
+                        )
+
                     st.rerun()
         else:
+            if batch_grading and not st.session_state.batch_graded:
+                with st.spinner("Grading all answers..."):
+                    feedbacks = interviewer.evaluate_answers_batch(
+                        [(a["question"], a["answer"]) for a in st.session_state.answers], model, use_cache=use_cache
+                    )
+                for answer_data, feedback in zip(st.session_state.answers, feedbacks):
+                    answer_data["feedback"] = feedback
+                st.session_state.batch_graded = True
+            for i, answer_data in enumerate(st.session_state.answers):
+                st.chat_message("user").write(f"Q{i+1}: {answer_data['question']}\n\nA: {answer_data['answer']}")
+                st.chat_message("assistant").write(answer_data['feedback'])
             st.success("All questions asked! Generating report...")
     else:
         st.warning("Please analyze a resume first")
 
 with tab3:
     st.header("Final Report & Database Save")
-    if st.session_state.candidate and len(st.session_state.answers) >= 5:
+    if st.session_state.candidate and st.session_state.questions and len(st.session_state.answers) >= len(st.session_state.questions):
         interview_score = 80 + len(st.session_state.answers)  # mock scoring
         final_score = (st.session_state.candidate["resume_score"] + interview_score) // 2
 
         if st.button("Generate Final Report & Save", type="primary"):
-            # Save to Supabase using admin client to bypass RLS
+            # The report includes feedback, so let outstanding evaluations finish first
+            if st.session_state.eval_queue.pending:
+                with st.spinner("Finishing answer evaluations..."):
+                    st.session_state.eval_queue.wait(st.session_state.answers)
+            # Save locally first; the outbox flusher uploads to Supabase (admin client, bypasses RLS)
+            # in the background and retries until it succeeds
             try:
-                supabase_admin.table("candidates").insert({
+                outbox = get_outbox()
+                outbox.enqueue({
                     "name": st.session_state.candidate["name"],
                     "resume_score": st.session_state.candidate["resume_score"],
                     "interview_score": interview_score,
                     "final_score": final_score,
                     "created_at": datetime.now().isoformat()
-                }).execute()
-                db_saved = True
-                st.success("Report generated and saved to database!")
+                }, idempotency_key=make_idempotency_key(
+                    st.session_state.candidate["name"],
+                    st.session_state.candidate["resume_text"],
+                    [a["answer"] for a in st.session_state.answers],
+                ), context={
+                    "resume_text": st.session_state.candidate["resume_text"],
+                    "details": st.session_state.candidate.get("details", {}),
+                    "answers": st.session_state.answers,
+                })
+                if outbox.backend is not None:
+                    st.success("Report generated and saved! Upload to the database continues in the background.")
+                else:
+                    st.success("Report generated and saved locally.")
+                    st.warning("No database configured (SUPABASE_SERVICE_ROLE_KEY missing): this record is stored "
+                               "on this server only and will not be uploaded.")
             except Exception as e:
-                st.warning(f"Database save failed: {e}. Proceeding with report generation.")
-                db_saved = False
+                st.warning(f"Local save failed: {e}. Proceeding with report generation.")
                 st.success("Report generated! (Database save skipped)")
+            get_candidate_store().save(
+                st.session_state.candidate["jd"], st.session_state.candidate["resume_text"],
+                st.session_state.candidate.get("details", {}), resume_score=st.session_state.candidate["resume_score"],
+                interview_score=interview_score, final_score=final_score, answers=st.session_state.answers,
+            )
 
             # Generate PDF
-            pdf_bytes = generate_pdf_report(st.session_state.candidate, st.session_state.answers, final_score)
+            pdf_bytes = generate_pdf_report(st.session_state.candidate, st.session_state.answers, final_score, use_cache=use_cache, model=model)
             st.download_button(
                 "Download Final Report (PDF)",
                 pdf_bytes,
@@ -307,4 +577,141 @@ with tab3:
                 mime="application/pdf"
             )
     else:
-        st.info("Complete interview to generate report")
\ No newline at end of file
+        st.info("Complete interview to generate report")
+
+    with st.expander("Bulk report export"):
+        stored = get_outbox().list_records()
+        if not stored:
+            st.caption("No saved candidates yet.")
+        else:
+            labels = [f"{r['record'].get('name', '?')} – final {r['record'].get('final_score', 'N/A')}/100" for r in stored]
+            picked = st.multiselect("Candidates", range(len(stored)), default=list(range(len(stored))),
+                                    format_func=lambda i: labels[i])
+            export_format = st.radio("Output", ["ZIP of PDFs", "Single combined PDF"], horizontal=True)
+            if st.button("Export Reports") and picked:
+                items = []
+                for i in picked:
+                    record, context = stored[i]["record"], stored[i]["context"]
+                    candidate = dict(record, resume_text=context.get("resume_text", ""), details=context.get("details", {}))
+                    items.append({"candidate": candidate, "answers": context.get("answers", []),
+                                  "final_score": record.get("final_score", 0)})
+                progress_bar = st.progress(0.0)
+                start = time.perf_counter()
+                data, timings = export_reports(
+                    items, output="pdf" if export_format == "Single combined PDF" else "zip",
+                    use_cache=use_cache, model=model,
+                    progress=lambda done, total: progress_bar.progress(done / total),
+                )
+                st.success(f"Rendered {len(items)} reports in {time.perf_counter() - start:.1f}s")
+                st.dataframe(timings, use_container_width=True)
+                if export_format == "Single combined PDF":
+                    st.download_button("Download Combined Report (PDF)", data, file_name="TalentFlow_Reports.pdf", mime="application/pdf")
+                else:
+                    st.download_button("Download Reports (ZIP)", data, file_name="TalentFlow_Reports.zip", mime="application/zip")
+
+    outbox_status = get_outbox().status()
+    if outbox_status["pending"] or outbox_status["last_error"]:
+        st.caption(
+            f"Database outbox: {outbox_status['pending']} record(s) waiting to upload"
+            + (f" (last error: {outbox_status['last_error']})" if outbox_status["last_error"] else "")
+        )
+
+with tab_board:
+    st.header("Candidate Leaderboard")
+    store = get_candidate_store()
+    jobs = store.jobs()
+    if not jobs:
+        st.info("No candidates stored yet. Screened resumes appear here.")
+    else:
+        # Any filter change starts again from the first page
+        def reset_leaderboard():
+            st.session_state.leaderboard_cursors = [None]
+
+        col_job, col_sort, col_size = st.columns([3, 2, 1])
+        job_options = [None] + [j[0] for j in jobs]
+        job_labels = {j[0]: f"{j[1]} ({j[2]} candidates)" for j in jobs}
+        board_jd = col_job.selectbox("Job description", job_options, format_func=lambda h: "All jobs" if h is None else job_labels[h],
+                                     key="board_jd", on_change=reset_leaderboard)
+        sort_labels = {"final_score": "Final score (interviewed)", "resume_score": "Resume score", "created_at": "Newest"}
+        board_sort = col_sort.selectbox("Rank by", SORT_COLUMNS, format_func=sort_labels.get, key="board_sort",
+                                        on_change=reset_leaderboard)
+        page_size = col_size.selectbox("Page size", [25, 50, 100], key="board_page_size", on_change=reset_leaderboard)
+        col_skills, col_cgpa, col_tenth, col_pu = st.columns([3, 1, 1, 1])
+        board_skills = col_skills.multiselect("Must have skills", leaderboard_skills(), key="board_skills",
+                                              on_change=reset_leaderboard)
+        min_cgpa = col_cgpa.number_input("Min CGPA", 0.0, 10.0, 0.0, 0.5, key="board_cgpa", on_change=reset_leaderboard)
+        min_tenth = col_tenth.number_input("Min 10th %", 0.0, 100.0, 0.0, 5.0, key="board_tenth", on_change=reset_leaderboard)
+        min_pu = col_pu.number_input("Min PU %", 0.0, 100.0, 0.0, 5.0, key="board_pu", on_change=reset_leaderboard)
+
+        cursors = st.session_state.leaderboard_cursors
+        rows, next_cursor = store.page(jd_hash=board_jd, sort=board_sort, limit=page_size, after=cursors[-1],
+                                       skills=board_skills, min_cgpa=min_cgpa, min_tenth=min_tenth, min_pu=min_pu)
+        first_rank = (len(cursors) - 1) * page_size + 1
+        if not rows:
+            st.caption("No candidates match these filters.")
+        else:
+            st.dataframe([
+                {
+                    "rank": first_rank + i,
+                    "name": r["name"],
+                    "final": r["final_score"],
+                    "resume": r["resume_score"],
+                    "interview": r["interview_score"],
+                    "CGPA": r["engineering_cgpa"],
+                    "10th %": r["tenth_pct"],
+                    "PU %": r["pu_pct"],
+                    "summary": r["summary"],
+                    "added": datetime.fromtimestamp(r["created_at"]).strftime("%Y-%m-%d %H:%M"),
+                }
+                for i, r in enumerate(rows)
+            ], use_container_width=True)
+
+        col_prev, col_page, col_next = st.columns([1, 2, 1])
+        if col_prev.button("◀ Previous", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+        col_page.caption(f"Page {len(cursors)} · ranks {first_rank}–{first_rank + max(len(rows) - 1, 0)}")
+        if col_next.button("Next ▶", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+
+        if rows:
+            # Resume text and answers are only read for the candidate being viewed
+            labels = {r["id"]: f"#{first_rank + i} {r['name']}" for i, r in enumerate(rows)}
+            col_pick, col_show = st.columns([3, 1])
+            picked_id = col_pick.selectbox("View candidate", list(labels), format_func=labels.get, key="board_view")
+            if col_show.checkbox("Show resume & answers", key="board_show_document"):
+                document = store.get_document(picked_id)
+                if document:
+                    st.write(f"**Skills:** {', '.join(store.get_skills(picked_id)) or 'N/A'}")
+                    st.json(document["details"])
+                    for i, a in enumerate(document["answers"]):
+                        st.markdown(f"**Q{i + 1}: {a.get('question', '')}**\n\n{a.get('answer', '')}\n\n_{a.get('feedback', '')}_")
+                    st.text_area("Resume text", document["resume_text"], height=300, disabled=True)
+
+with tab4:
+    st.header("Pipeline Metrics")
+    st.caption("Per-stage timings since this server process started (percentiles over the most recent samples).")
+    summary = metrics.store.summary()
+    if not summary:
+        st.info("No samples yet. Metrics appear as resumes are screened and interviews run.")
+    else:
+        st.dataframe([
+            {
+                "stage": stage,
+                "count": s["count"],
+                "error rate": f"{s['error_rate']:.1%}",
+                "p50 (s)": round(s["p50"], 3),
+                "p95 (s)": round(s["p95"], 3),
+                "p99 (s)": round(s["p99"], 3),
+                "mean (s)": round(s["mean"], 3),
+                **{k: int(v) for k, v in s["totals"].items()},
+            }
+            for stage, s in summary.items()
+        ], use_container_width=True)
+        col_json, col_prom, col_reset = st.columns(3)
+        col_json.download_button("Download JSON", metrics.store.to_json(), file_name="talentflow_metrics.json", mime="application/json")
+        col_prom.download_button("Download Prometheus text", metrics.store.to_prometheus(), file_name="talentflow_metrics.prom", mime="text/plain")
+        if col_reset.button("Reset metrics"):
+            metrics.store.reset()
+            st.rerun()
@@ -0,0 +1,326 @@
+"""
+Offline benchmark suite for the screening / interview pipeline.
+
+Runs every stage against synthetic inputs and a deterministic stub in place
+of Gemini, so results only reflect local work (plus --stub-latency if set).
+Whisper transcription is measured only when the whisper package is installed.
+
+    python benchmarks/run_benchmarks.py                       # print results as JSON
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --save-baseline       # write benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json --tolerance 0.25
+
+Exits with status 1 if any stage's p50 regressed past the tolerance.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import synthetic  # noqa: E402
+from utils import interviewer  # noqa: E402
+from utils.audio_frontend import Resampler, trim_silence  # noqa: E402
+from utils.candidate_store import CandidateStore, jd_hash  # noqa: E402
+from utils.dedup import ResumeIndex  # noqa: E402
+from utils.metrics import percentile  # noqa: E402
+from utils.relevance import RelevanceIndex  # noqa: E402
+from utils.report_generator import export_reports, generate_pdf_report  # noqa: E402
+from utils.resume_parser import extract_text_from_pdf  # noqa: E402
+from utils.screening import score_resume, screen_resumes  # noqa: E402
+from utils.transcription import StreamingTranscriber  # noqa: E402
+from utils.transcription_pool import TranscriptionPool  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+
+def measure(fn, repeat, items_per_call=1, warmup=1):
+    """Call fn() `repeat` times; return latency distribution, throughput and peak traced memory."""
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    # Memory is traced in a separate run: tracemalloc slows allocation-heavy code a lot
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        "runs": repeat,
+        "min": latencies[0],
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "max": latencies[-1],
+        "mean": statistics.fmean(latencies),
+        "throughput_per_s": (repeat * items_per_call) / total if total else 0.0,
+        "peak_mem_mb": peak / 1e6,
+    }
+
+
+def bench_extraction(repeat):
+    results = {}
+    for pages in (1, 3, 10, 40):
+        data = synthetic.resume_pdf(seed=pages, pages=pages)
+        results[f"extract_pdf_{pages}p"] = measure(lambda: extract_text_from_pdf(io.BytesIO(data)), repeat)
+        results[f"extract_pdf_{pages}p_full"] = measure(
+            lambda: extract_text_from_pdf(io.BytesIO(data), max_pages=None, max_chars=None), repeat
+        )
+    return results
+
+
+def bench_llm_stages(repeat, model):
+    resume = synthetic.resume_text(seed=1, pages=2)
+    return {
+        "score_resume": measure(lambda: score_resume(synthetic.JD, resume, model, use_cache=False), repeat),
+        "generate_questions": measure(
+            lambda: interviewer.generate_interview_questions(synthetic.JD, resume, use_cache=False, model=model), repeat
+        ),
+        "evaluate_answer": measure(
+            lambda: interviewer.evaluate_answer("Describe a project.", "I built a Python service on AWS.", model, use_cache=False),
+            repeat,
+        ),
+    }
+
+
+def bench_report(repeat, model):
+    candidate = {"name": "Synthetic Candidate", "resume_score": 78, "interview_score": 85,
+                 "resume_text": synthetic.resume_text(seed=2)}
+    answers = [{"question": f"Q{i}", "answer": "An answer.", "feedback": "Fine. 7/10"} for i in range(5)]
+    items = [{"candidate": dict(candidate, name=f"Candidate {i}"), "answers": answers, "final_score": 80} for i in range(20)]
+    return {
+        "generate_pdf_report": measure(lambda: generate_pdf_report(candidate, answers, 80, use_cache=False, model=model), repeat),
+        "export_reports_20_zip": measure(
+            lambda: export_reports(items, output="zip", use_cache=False, model=model), max(1, repeat // 5), items_per_call=len(items)
+        ),
+        "export_reports_20_pdf": measure(
+            lambda: export_reports(items, output="pdf", use_cache=False, model=model), max(1, repeat // 5), items_per_call=len(items)
+        ),
+    }
+
+
+def bench_bulk_screening(repeat, model, pool_size=40):
+    files = [(f"resume_{i}.pdf", synthetic.resume_pdf(seed=i, pages=1 + i % 3)) for i in range(pool_size)]
+
+    def run(top_k=None):
+        rows = list(screen_resumes(synthetic.JD, files, model, concurrency=8, use_cache=False,
+                                   top_k=top_k, index=RelevanceIndex(":memory:")))
+        assert len(rows) == pool_size
+
+    runs = max(1, repeat // 5)
+    return {
+        f"bulk_screen_{pool_size}": measure(run, runs, items_per_call=pool_size),
+        f"bulk_screen_{pool_size}_top10": measure(lambda: run(top_k=10), runs, items_per_call=pool_size),
+    }
+
+
+def bench_candidate_store(repeat, rows=100_000, jobs=20):
+    # Leaderboard queries over a 100k-candidate store (rows are built once, outside the timings)
+    skills = ["Python", "SQL", "AWS", "Docker", "React", "Java", "Go", "Machine Learning", "NLP", "Spark"]
+    jds = [f"{synthetic.JD}\nOpening {j}" for j in range(jobs)]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CandidateStore(os.path.join(tmp, "candidates.db"))
+        start = time.perf_counter()
+        for j, jd in enumerate(jds):
+            batch = []
+            for i in range(rows // jobs):
+                seed = j * rows + i
+                batch.append((f"resume {seed}", {
+                    "name": f"Candidate {seed}", "score": 30 + seed * 7 % 70,
+                    "10th_marks": f"{60 + seed % 40}%", "pu_marks": f"{6 + seed % 40 / 10:.1f}",
+                    "engineering_cgpa": f"{6 + seed * 3 % 40 / 10:.1f}",
+                    "skills": [skills[(seed + k) % len(skills)] for k in range(0, 9, 3)],
+                }))
+            store.save_many(jd, batch)
+        insert_seconds = time.perf_counter() - start
+        store._conn.execute("UPDATE candidates SET interview_score = 60 + resume_score % 40, "
+                            "final_score = (2 * resume_score + 60) / 2 WHERE id % 2 = 0")
+        store._conn.commit()
+
+        job = jd_hash(jds[0])
+        deep_cursor = store.page(jd_hash=job, limit=2000)[1]
+        results = {
+            "store_top50_per_jd": measure(lambda: store.page(jd_hash=job, limit=50), repeat),
+            "store_top50_skills_cgpa": measure(
+                lambda: store.page(skills=["python", "docker"], min_cgpa=8, limit=50), repeat),
+            "store_page_deep": measure(lambda: store.page(jd_hash=job, limit=50, after=deep_cursor), repeat),
+        }
+        results["store_top50_per_jd"]["rows"] = rows
+        results["store_top50_per_jd"]["insert_rows_per_s"] = rows / insert_seconds
+        store._conn.close()
+    return results
+
+
+def bench_resume_index(repeat, docs=5000):
+    # Resubmission lookups against 5k fingerprinted resumes: an edited copy (near-duplicate) and a new resume
+    index = ResumeIndex(":memory:")
+    for seed in range(docs):
+        index.add(synthetic.resume_text(seed), jd=synthetic.JD, result={"score": seed % 100})
+    words = synthetic.resume_text(7).split()
+    edited = " ".join(words[:-20] + ["Updated phone and email"])
+    unseen = synthetic.resume_text(docs + 1)
+    results = {
+        "dedup_near_duplicate": measure(lambda: index.find(edited, synthetic.JD), repeat),
+        "dedup_new_resume": measure(lambda: index.find(unseen, synthetic.JD), repeat),
+    }
+    results["dedup_near_duplicate"]["indexed_resumes"] = docs
+    return results
+
+
+def bench_audio_frontend(repeat):
+    # 30 s answer captured at 48 kHz in 20 ms WebRTC frames, with silence before and after
+    clip = synthetic.audio_clip(30, seed=3, sample_rate=48000)
+    padded = np.concatenate([np.zeros(48000 * 3, dtype=np.float32), clip, np.zeros(48000 * 3, dtype=np.float32)])
+    speech = synthetic.audio_clip(30, seed=3)
+
+    def stream_resample():
+        resampler = Resampler(48000)
+        for i in range(0, len(padded), 960):
+            resampler.process(padded[i:i + 960])
+
+    # Same answer recorded on a noisy laptop mic: a -40 dBFS floor instead of digital silence around it
+    rng = np.random.default_rng(0)
+    noise = (10 ** (-40 / 20) * rng.standard_normal(16000 * 3)).astype(np.float32)
+    noisy = np.concatenate([noise, speech, noise])
+
+    results = {
+        "resample_48k_36s_stream": measure(stream_resample, max(1, repeat // 5)),
+        "vad_trim_30s": measure(lambda: trim_silence(speech), repeat),
+        "vad_trim_36s_noisy_floor": measure(lambda: trim_silence(noisy), repeat),
+    }
+    results["vad_trim_36s_noisy_floor"]["seconds_removed"] = trim_silence(noisy)[1]
+    return results
+
+
+def bench_transcription(repeat, whisper_size):
+    try:
+        import whisper
+    except ImportError:
+        return {"transcribe": {"skipped": "whisper not installed"}}
+    model = whisper.load_model(whisper_size)
+    results = {}
+    for seconds in (5, 15, 30):
+        clip = synthetic.audio_clip(seconds, seed=seconds)
+
+        def run():
+            transcriber = StreamingTranscriber(model)
+            transcriber.feed(clip)
+            transcriber.finish()
+
+        results[f"transcribe_{seconds}s_{whisper_size}"] = measure(run, max(1, repeat // 5), warmup=0)
+
+    # Ten interviews finishing at once: 10 s clips through the shared worker pool
+    clips = [synthetic.audio_clip(10, seed=i) for i in range(10)]
+    for quantize in (False, True):
+        pool = TranscriptionPool(whisper_size, quantize=quantize).start()
+        try:
+            pool.submit(clips[0]).result()  # wait for the workers to load
+            label = f"transcribe_pool_10x10s_{whisper_size}" + ("_int8" if quantize else "")
+            results[label] = measure(lambda: [f.result() for f in [pool.submit(c) for c in clips]],
+                                     max(1, repeat // 10), items_per_call=len(clips), warmup=0)
+            results[label]["queue"] = pool.stats()
+        finally:
+            pool.shutdown()
+    return results
+
+
+def compare(results, baseline, tolerance, min_delta=0.001):
+    """List stages whose p50 got slower than baseline by more than tolerance (and min_delta seconds)."""
+    regressions = []
+    for stage, current in results["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base or "p50" not in base or "p50" not in current:
+            continue
+        if current["p50"] > base["p50"] * (1 + tolerance) and current["p50"] - base["p50"] > min_delta:
+            regressions.append({
+                "stage": stage,
+                "baseline_p50": base["p50"],
+                "current_p50": current["p50"],
+                "change": current["p50"] / base["p50"] - 1 if base["p50"] else float("inf"),
+            })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per stage (bulk stages use repeat/5)")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="seconds of simulated Gemini latency per call")
+    parser.add_argument("--whisper-model", default="tiny", help="Whisper size for the transcription stage")
+    parser.add_argument("--stages", default="extract,llm,report,bulk,store,transcribe",
+                        help="comma-separated subset of: extract,llm,report,bulk,store,transcribe")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--save-baseline", action="store_true", help=f"also write results to {DEFAULT_BASELINE}")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    model = synthetic.stub_model(latency=args.stub_latency)
+    wanted = set(args.stages.split(","))
+    stages = {}
+    if "extract" in wanted:
+        stages.update(bench_extraction(args.repeat))
+    if "llm" in wanted:
+        stages.update(bench_llm_stages(args.repeat, model))
+    if "report" in wanted:
+        stages.update(bench_report(args.repeat, model))
+    if "bulk" in wanted:
+        stages.update(bench_bulk_screening(args.repeat, model))
+    if "store" in wanted:
+        stages.update(bench_candidate_store(args.repeat))
+        stages.update(bench_resume_index(args.repeat))
+    if "transcribe" in wanted:
+        stages.update(bench_audio_frontend(args.repeat))
+        stages.update(bench_transcription(args.repeat, args.whisper_model))
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+            "stub_latency": args.stub_latency,
+        },
+        "stages": stages,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        results["regressions"] = regressions
+        if regressions:
+            exit_code = 1
+            for r in regressions:
+                print(f"REGRESSION {r['stage']}: p50 {r['baseline_p50'] * 1000:.2f}ms -> "
+                      f"{r['current_p50'] * 1000:.2f}ms ({r['change']:+.0%})", file=sys.stderr)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(DEFAULT_BASELINE, "w") as f:
+            f.write(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
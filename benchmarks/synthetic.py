@@ -0,0 +1,80 @@
+"""Deterministic synthetic inputs for the benchmark suite: resumes, PDFs, audio and a stub Gemini model."""
+import json
+import random
+
+import numpy as np
+from fpdf import FPDF
+
+from utils.llm_client import StubModel
+
+SKILLS = [
+    "Python", "Java", "SQL", "AWS", "Docker", "Kubernetes", "React", "Node.js", "TensorFlow", "PyTorch",
+    "Pandas", "NumPy", "Spark", "Git", "Linux", "C++", "Go", "REST APIs", "Machine Learning", "NLP",
+]
+FILLER = (
+    "designed built maintained improved scaled deployed optimized led mentored delivered analyzed "
+    "services pipelines dashboards models features platform customers latency reliability team project"
+).split()
+
+JD = (
+    "We are hiring a backend engineer with strong Python, SQL and AWS experience. "
+    "Familiarity with Docker, Kubernetes and REST APIs is expected; machine learning exposure is a plus."
+)
+
+
+def resume_text(seed, pages=1, words_per_page=350):
+    rng = random.Random(seed)
+    lines = [f"Candidate {seed}", "Education: B.E. Computer Science, CGPA 8.{}".format(seed % 10)]
+    lines.append("Skills: " + ", ".join(rng.sample(SKILLS, 6)))
+    for _ in range(pages):
+        words = [rng.choice(FILLER + SKILLS) for _ in range(words_per_page)]
+        lines.append(" ".join(words))
+    return "\n".join(lines)
+
+
+def resume_pdf(seed, pages=1):
+    """Latin-1 PDF bytes with roughly one page of text per requested page."""
+    text = resume_text(seed, pages=pages)
+    pdf = FPDF(format="A4")
+    pdf.set_auto_page_break(auto=False)
+    chunks = text.split("\n")
+    header, body = chunks[:3], chunks[3:]
+    for i in range(pages):
+        pdf.add_page()
+        pdf.set_font("Arial", size=10)
+        if i == 0:
+            for line in header:
+                pdf.multi_cell(0, 5, line)
+        pdf.multi_cell(0, 5, body[i] if i < len(body) else "")
+    return pdf.output(dest="S").encode("latin-1")
+
+
+def audio_clip(seconds, seed=0, sample_rate=16000):
+    """Speech-like test signal: voiced bursts (harmonic tones) separated by low-level noise."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sample_rate)
+    t = np.arange(n) / sample_rate
+    envelope = (np.sin(2 * np.pi * 0.5 * t) > 0).astype(np.float32)
+    voiced = sum(np.sin(2 * np.pi * f * t) / k for k, f in enumerate((180, 360, 540), start=1))
+    signal = 0.3 * envelope * voiced + 0.01 * rng.standard_normal(n)
+    return signal.astype(np.float32)
+
+
+def _stub_responder(prompt):
+    # Shape the reply like the real prompts expect, deterministically
+    if "score this resume" in prompt:
+        return json.dumps({
+            "name": "Synthetic Candidate", "10th_marks": "90%", "pu_marks": "88%", "engineering_cgpa": "8.5",
+            "score": 78, "match_percentage": "78%", "strengths": ["Python", "SQL"], "gaps": ["Kubernetes"],
+            "skills": ["Python", "SQL", "Docker"], "summary": "Solid backend fit",
+            "questions": [f"Synthetic question {i} about the candidate's projects?" for i in range(1, 6)],
+        })
+    if "interview questions" in prompt:
+        return "\n".join(f"{i}. Synthetic question {i} about the candidate's projects?" for i in range(1, 6))
+    if "Evaluate" in prompt:
+        return "Clear, structured answer with a relevant example. Score: 7/10"
+    return "Synthetic hiring summary.\n\n- Strength one\n- Strength two\n\nRecommendation: REVIEW"
+
+
+def stub_model(latency=0.0):
+    return StubModel(responder=_stub_responder, latency=latency, model_name="benchmark-stub")
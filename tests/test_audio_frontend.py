@@ -0,0 +1,75 @@
+import numpy as np
+
+from utils.audio_frontend import SAMPLE_RATE, Resampler, resample, speech_mask, trim_silence
+from utils.transcription import StreamingTranscriber
+
+
+def tone(seconds, level=0.3, freq=220.0, sample_rate=SAMPLE_RATE):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    # Slow amplitude wobble, like speech levelled by a microphone's AGC
+    return (level * np.sin(2 * np.pi * freq * t) * (1 + 0.1 * np.sin(2 * np.pi * 3 * t))).astype(np.float32)
+
+
+def noise(seconds, db, seed=0):
+    return (10 ** (db / 20) * np.random.default_rng(seed).standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32)
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio, **options):
+        self.calls += 1
+        return {"text": "words"}
+
+
+def test_quiet_room_noise_is_silence():
+    trimmed, removed = trim_silence(noise(3, -60))
+    assert len(trimmed) == 0
+    assert removed == 3.0
+
+
+def test_flat_loud_audio_is_kept_whole():
+    audio = tone(5)
+    mask, _ = speech_mask(audio)
+    assert mask.all()
+    trimmed, removed = trim_silence(audio)
+    assert removed == 0.0
+    assert len(trimmed) == len(audio)
+
+
+def test_leading_and_trailing_silence_trimmed_over_noisy_floor():
+    pad = noise(2, -40)
+    audio = np.concatenate([pad, tone(3) + noise(3, -40, seed=1), pad])
+    trimmed, removed = trim_silence(audio)
+    # Both pads go, minus the padding kept around speech
+    assert 3.5 < removed <= 4.0
+    assert 3.0 <= len(trimmed) / SAMPLE_RATE < 3.5
+
+
+def test_long_pause_is_shortened_not_dropped():
+    audio = np.concatenate([tone(2), np.zeros(3 * SAMPLE_RATE, dtype=np.float32), tone(2)])
+    trimmed, removed = trim_silence(audio)
+    assert 2.0 < removed < 3.0
+    assert len(trimmed) / SAMPLE_RATE > 4.0
+
+
+def test_streaming_transcriber_keeps_continuous_speech():
+    model = CountingModel()
+    transcriber = StreamingTranscriber(model).start()
+    audio = tone(25)
+    for i in range(0, len(audio), 320):
+        transcriber.feed(audio[i:i + 320])
+    transcriber.finish()
+    assert model.calls == 3
+    assert transcriber.silence_removed == 0.0
+
+
+def test_chunked_resampling_matches_whole_clip():
+    audio = tone(1, sample_rate=48000)
+    whole = resample(audio, 48000)
+    resampler = Resampler(48000)
+    chunked = np.concatenate([resampler.process(audio[i:i + 960]) for i in range(0, len(audio), 960)])
+    assert abs(len(chunked) - SAMPLE_RATE) <= 1
+    n = min(len(whole), len(chunked))
+    assert np.max(np.abs(whole[:n] - chunked[:n])) < 1e-4
@@ -0,0 +1,77 @@
+from utils.candidate_store import CandidateStore, cgpa, jd_hash, marks_percent
+
+JD = "Backend engineer: Python, Django, PostgreSQL, AWS."
+
+
+def details(name, score, skills=(), tenth="", cgpa_value=""):
+    return {"name": name, "score": score, "match_percentage": f"{score}%", "summary": f"{name} summary",
+            "skills": list(skills), "10th_marks": tenth, "engineering_cgpa": cgpa_value}
+
+
+def test_marks_are_normalized():
+    assert marks_percent("92%") == 92.0
+    assert marks_percent("9.1 CGPA") == 86.45
+    assert marks_percent("") is None
+    assert cgpa("8.2") == 8.2
+    assert cgpa("82%") == 8.2
+
+
+def test_saving_twice_updates_one_candidate():
+    store = CandidateStore(":memory:")
+    first = store.save(JD, "resume text", details("Alice", 70), resume_score=70)
+    again = store.save(JD, "resume text", details("Alice", 70), interview_score=90, final_score=80,
+                       answers=[{"question": "q", "answer": "a"}])
+
+    assert again == first
+    assert store.count(jd_hash(JD), sort="resume_score") == 1
+    [row] = store.top(JD)
+    assert (row["resume_score"], row["interview_score"], row["final_score"]) == (70, 90, 80)
+    document = store.get_document(first)
+    assert document["resume_text"] == "resume text"
+    assert document["answers"] == [{"question": "q", "answer": "a"}]
+
+
+def test_pages_cover_every_candidate_once():
+    store = CandidateStore(":memory:")
+    # Repeated scores make the id tiebreak in the cursor matter
+    store.save_many(JD, [(f"resume {i}", details(f"C{i}", i % 7)) for i in range(23)])
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = store.page(jd_hash(JD), sort="resume_score", limit=5, after=cursor)
+        seen.extend(rows)
+        if cursor is None:
+            break
+    assert len(seen) == 23
+    assert len({row["id"] for row in seen}) == 23
+    assert [row["resume_score"] for row in seen] == sorted((i % 7 for i in range(23)), reverse=True)
+    assert all("resume_text" not in row for row in seen)
+
+
+def test_filters_by_skills_and_marks():
+    store = CandidateStore(":memory:")
+    store.save_many(JD, [
+        ("a", details("Alice", 80, ["Python", "Docker"], cgpa_value="8.5", tenth="95%")),
+        ("b", details("Bob", 75, ["python"], cgpa_value="7.0", tenth="90%")),
+        ("c", details("Carol", 90, ["Java", "Docker"], cgpa_value="9.0")),
+    ])
+
+    def names(**filters):
+        rows, _ = store.page(jd_hash(JD), sort="resume_score", **filters)
+        return [row["name"] for row in rows]
+
+    assert names(skills=["Python"]) == ["Alice", "Bob"]
+    assert names(skills=["python", "docker"]) == ["Alice"]
+    assert names(min_cgpa=8.0) == ["Carol", "Alice"]
+    assert names(min_tenth=92) == ["Alice"]
+    assert names(min_score=78) == ["Carol", "Alice"]
+    assert store.count(jd_hash(JD), sort="resume_score", skills=["docker"]) == 2
+
+
+def test_final_score_lists_only_interviewed_candidates():
+    store = CandidateStore(":memory:")
+    store.save(JD, "a", details("Alice", 70))
+    store.save(JD, "b", details("Bob", 60), interview_score=90, final_score=75)
+
+    assert [row["name"] for row in store.top(JD)] == ["Bob"]
+    assert [row["name"] for row in store.top(JD, sort="resume_score")] == ["Alice", "Bob"]
@@ -0,0 +1,73 @@
+from benchmarks import synthetic
+from utils.dedup import ResumeIndex, minhash, similarity
+
+JD = synthetic.JD
+OTHER_JD = "Frontend engineer: React, TypeScript, CSS."
+
+
+def make_index():
+    return ResumeIndex(":memory:")
+
+
+def test_same_file_skips_extraction():
+    index = make_index()
+    text = synthetic.resume_text(1)
+    index.add(text, b"%PDF-1 bytes", JD, {"score": 70})
+
+    match = index.find_file(b"%PDF-1 bytes", JD)
+    assert match.kind == "file"
+    assert match.resume_text == text
+    assert match.result == {"score": 70}
+    assert index.find_file(b"other bytes", JD) is None
+
+
+def test_same_text_ignores_layout():
+    index = make_index()
+    text = synthetic.resume_text(2)
+    index.add(text, jd=JD, result={"score": 55})
+
+    match = index.find("  " + text.upper().replace(" ", "\n"), JD)
+    assert match.kind == "text"
+    assert match.result == {"score": 55}
+
+
+def test_near_duplicate_found_and_result_is_per_jd():
+    index = make_index()
+    for seed in range(50):
+        index.add(synthetic.resume_text(seed), jd=JD, result={"score": seed})
+    words = synthetic.resume_text(7).split()
+    edited = " ".join(words[:-20] + ["Updated phone and email"])
+
+    match = index.find(edited, JD)
+    assert match.kind == "near"
+    assert match.similarity >= index.threshold
+    assert match.result == {"score": 7}
+    # Known resume, but never screened against this JD
+    assert index.find(edited, OTHER_JD).result is None
+
+
+def test_unrelated_resume_is_new():
+    index = make_index()
+    for seed in range(50):
+        index.add(synthetic.resume_text(seed))
+    assert index.find(synthetic.resume_text(1000), JD) is None
+    assert similarity(minhash(synthetic.resume_text(1)), minhash(synthetic.resume_text(2))) < 0.5
+
+
+def test_empty_or_scanned_text_never_matches():
+    index = make_index()
+    assert index.add("", b"scan-1", JD, {"score": 90}) is None
+    assert index.add("Page 1", b"scan-2", JD, {"score": 90}) is None
+
+    assert index.find("", JD) is None
+    assert index.find_file(b"scan-1", JD) is None
+    assert index.stats()["resumes"] == 0
+
+
+def test_adding_again_reuses_the_entry():
+    index = make_index()
+    text = synthetic.resume_text(3)
+    doc_id = index.add(text, b"pdf")
+    assert index.add(text, jd=JD, result={"score": 40}) == doc_id
+    assert index.find_file(b"pdf", JD).result == {"score": 40}
+    assert index.stats()["resumes"] == 1
@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from utils.llm_client import GeminiClient, StubModel, TokenBucket
+
+
+def make_client(model, **settings):
+    settings = {"backoff": 0.0, "requests_per_minute": 60_000, **settings}
+    return GeminiClient(model=model, **settings)
+
+
+def test_retries_transient_failures():
+    stub = StubModel(responder=lambda p: "ok", fail_times=2)
+    client = make_client(stub, max_retries=3)
+
+    assert client.generate_content("prompt").text == "ok"
+    assert stub.calls == 3
+    stats = client.stats()
+    assert stats["calls"] == 1
+    assert stats["retries"] == 2
+    assert stats["errors"] == 0
+
+
+def test_gives_up_after_max_retries():
+    stub = StubModel(fail_times=10)
+    client = make_client(stub, max_retries=2)
+
+    with pytest.raises(ConnectionError):
+        client.generate_content("prompt")
+    assert stub.calls == 3
+    assert client.stats()["errors"] == 1
+
+
+def test_does_not_retry_permanent_errors():
+    stub = StubModel(fail_times=1, error=ValueError("bad request"))
+    client = make_client(stub, max_retries=3)
+
+    with pytest.raises(ValueError):
+        client.generate_content("prompt")
+    assert stub.calls == 1
+
+
+def test_call_timeout_is_retried_then_raised():
+    stub = StubModel(latency=0.5)
+    client = make_client(stub, timeout=0.05, max_retries=1)
+
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        client.generate_content("prompt")
+    # Two attempts of ~timeout each, not two full model latencies
+    assert time.perf_counter() - start < 0.5
+    assert stub.calls == 2
+    assert client.stats()["timeouts"] == 1
+
+
+def test_caps_requests_in_flight():
+    in_flight = []
+    lock = threading.Lock()
+    peak = [0]
+
+    def responder(prompt):
+        with lock:
+            in_flight.append(prompt)
+            peak[0] = max(peak[0], len(in_flight))
+        time.sleep(0.02)
+        with lock:
+            in_flight.remove(prompt)
+        return prompt
+
+    client = make_client(StubModel(responder=responder), max_concurrency=3)
+    responses = client.generate_many([f"p{i}" for i in range(12)])
+
+    assert [r.text for r in responses] == [f"p{i}" for i in range(12)]
+    assert peak[0] == 3
+
+
+def test_generate_many_returns_errors_in_place():
+    client = make_client(StubModel(responder=lambda p: p, fail_times=1, error=ValueError("bad")), max_concurrency=1)
+    first, second = client.generate_many(["a", "b"])
+
+    assert isinstance(first, ValueError)
+    assert second.text == "b"
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50.0, capacity=1)
+    start = time.perf_counter()
+    for _ in range(6):
+        bucket.acquire()
+    # The first token is free, the next five wait 20 ms each
+    assert time.perf_counter() - start >= 0.09
@@ -0,0 +1,72 @@
+from utils.persistence import CandidateOutbox, LocalBackend, make_idempotency_key
+
+
+def make_outbox(tmp_path, backend, **settings):
+    # backoff=0 makes failed records due again immediately
+    return CandidateOutbox(backend=backend, path=str(tmp_path / "outbox.db"), backoff=0.0, **settings)
+
+
+def record(name):
+    return {"name": name, "resume_score": 70, "interview_score": 85, "final_score": 77}
+
+
+def test_flush_retries_after_backend_failures(tmp_path):
+    backend = LocalBackend(fail_times=2)
+    outbox = make_outbox(tmp_path, backend)
+    keys = [outbox.enqueue(record(name)) for name in ("Alice", "Bob", "Carol")]
+
+    assert outbox.flush() == 0
+    assert outbox.flush() == 0
+    assert outbox.status() == {"pending": 3, "sent": 0, "last_error": "local backend failure"}
+
+    assert outbox.flush_all() == 3
+    assert outbox.status() == {"pending": 0, "sent": 3, "last_error": None}
+    assert set(backend.rows) == set(keys)
+    assert backend.batches == 1
+
+
+def test_failed_batch_waits_for_backoff(tmp_path):
+    backend = LocalBackend(fail_times=1)
+    outbox = CandidateOutbox(backend=backend, path=str(tmp_path / "outbox.db"), backoff=60.0)
+    outbox.enqueue(record("Alice"))
+
+    assert outbox.flush() == 0
+    # Not due again until the backoff has passed
+    assert outbox.flush() == 0
+    assert backend.batches == 0
+    assert outbox.status()["pending"] == 1
+
+
+def test_duplicate_keys_upload_once(tmp_path):
+    backend = LocalBackend()
+    outbox = make_outbox(tmp_path, backend)
+    key = make_idempotency_key("Alice", "resume text", ["answer 1", "answer 2"])
+
+    assert outbox.enqueue(record("Alice"), idempotency_key=key) == key
+    assert outbox.enqueue(record("Alice"), idempotency_key=key) == key
+    assert outbox.flush_all() == 1
+
+    # Saving the same candidate again after the upload sends nothing new
+    outbox.enqueue(record("Alice"), idempotency_key=key)
+    assert outbox.flush_all() == 0
+    assert list(backend.rows) == [key]
+    assert outbox.status() == {"pending": 0, "sent": 1, "last_error": None}
+
+
+def test_records_stay_local_without_backend(tmp_path):
+    outbox = make_outbox(tmp_path, None)
+    outbox.enqueue(record("Alice"), context={"resume_text": "resume text"})
+
+    assert outbox.flush_all() == 0
+    assert outbox.status()["pending"] == 1
+    [stored] = outbox.list_records()
+    assert stored["record"]["name"] == "Alice"
+    assert stored["context"] == {"resume_text": "resume text"}
+
+
+def test_outbox_survives_restart(tmp_path):
+    make_outbox(tmp_path, None).enqueue(record("Alice"))
+
+    backend = LocalBackend()
+    assert make_outbox(tmp_path, backend).flush_all() == 1
+    assert [row["name"] for row in backend.rows.values()] == ["Alice"]
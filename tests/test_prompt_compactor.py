@@ -0,0 +1,43 @@
+from utils.prompt_compactor import clean_text, compact_answers, compact_resume, truncate_to_budget
+
+ANSWER = "Resume\nI led the migration.\n\nI led the migration.\n1/2\nWe cut   latency in half."
+
+
+def test_answers_keep_every_line():
+    transcript = compact_answers([{"question": "Tell me about a project.", "answer": ANSWER,
+                                   "feedback": "Clear and specific. 8/10"}])
+    assert transcript.text == (
+        "Q1: Tell me about a project.\n"
+        "A1: Resume\nI led the migration.\nI led the migration.\n1/2\nWe cut latency in half.\n"
+        "Score: 8/10"
+    )
+
+
+def test_resume_cleaning_drops_boilerplate_and_repeats():
+    assert clean_text(ANSWER) == "I led the migration.\nWe cut latency in half."
+
+
+def test_answers_share_the_budget():
+    answers = [{"question": f"Q{i}", "answer": "word " * 400} for i in range(4)]
+    transcript = compact_answers(answers, budget=200)
+    assert transcript.tokens_after <= 210
+    assert transcript.text.count("\nA") == 4
+
+
+def test_truncate_ends_on_a_boundary():
+    text = "First sentence here. Second sentence is longer than the first one."
+    assert truncate_to_budget(text, 8).rstrip(".") == "First sentence here"
+    assert truncate_to_budget(text, None) == text
+
+
+def test_resume_keeps_header_and_jd_relevant_sections():
+    resume = "\n".join([
+        "Alice Smith", "alice@example.com",
+        "Hobbies", "Chess and hiking",
+        "Experience", "Built Django services on AWS for five years.",
+        "Achievements", "Won a college quiz. " * 40,
+    ])
+    compacted = compact_resume(resume, jd="Django AWS backend engineer", budget=40)
+    assert compacted.kept[:2] == ["header", "experience"]
+    assert "boilerplate" in compacted.dropped
+    assert "Chess" not in compacted.text
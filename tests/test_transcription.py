@@ -0,0 +1,78 @@
+import threading
+import time
+
+import numpy as np
+
+from utils.audio_frontend import SAMPLE_RATE
+from utils.transcription import RingBuffer, StreamingTranscriber
+
+
+class EchoModel:
+    """Returns the clip length, so the transcript shows which windows were decoded."""
+
+    def __init__(self, fail=None):
+        self.calls = 0
+        self.fail = fail
+
+    def transcribe(self, audio, **options):
+        self.calls += 1
+        if self.fail:
+            raise self.fail
+        return {"text": f"{len(audio) / SAMPLE_RATE:.1f}s"}
+
+
+def speech(seconds):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def stream_threads():
+    return sum(t.name == "whisper-stream" for t in threading.enumerate())
+
+
+def test_thread_starts_with_the_first_audio():
+    before = stream_threads()
+    transcriber = StreamingTranscriber(EchoModel())
+    assert stream_threads() == before
+    transcriber.feed(speech(0.1))
+    assert stream_threads() == before + 1
+    transcriber.close(timeout=1)
+    assert stream_threads() == before
+
+
+def test_finish_transcribes_windows_and_tail():
+    model = EchoModel()
+    transcriber = StreamingTranscriber(model, window_seconds=2, vad=False)
+    transcriber.feed(speech(5))
+    assert transcriber.finish(timeout=5) == "2.0s 2.0s 1.0s"
+    assert model.calls == 3
+
+
+def test_close_discards_the_tail_and_cannot_restart():
+    model = EchoModel()
+    before = stream_threads()
+    transcriber = StreamingTranscriber(model, window_seconds=2, vad=False)
+    transcriber.close()
+    transcriber.feed(speech(3))
+    assert stream_threads() == before
+    assert model.calls == 0
+
+
+def test_failed_windows_count_as_lost_audio():
+    transcriber = StreamingTranscriber(EchoModel(fail=TimeoutError("queue full")), window_seconds=2, vad=False,
+                                       queue_retries=1)
+    transcriber.feed(speech(4))
+    deadline = time.time() + 5
+    while transcriber.position < 4 * SAMPLE_RATE and time.time() < deadline:
+        time.sleep(0.01)
+    assert transcriber.finish(timeout=5) == ""
+    assert transcriber.lost_seconds == 4.0
+    assert transcriber.errors == ["queue full", "queue full"]
+
+
+def test_ring_buffer_counts_overwritten_audio():
+    buffer = RingBuffer(capacity=100)
+    buffer.write(np.arange(250, dtype=np.int16))
+    data = buffer.read(0, 250)
+    assert len(data) == 100
+    assert buffer.dropped == 150
@@ -0,0 +1,37 @@
+from collections import deque
+
+import numpy as np
+
+from utils.audio_frontend import SAMPLE_RATE
+from utils.transcription_pool import take_batch
+
+CLIP = np.zeros(SAMPLE_RATE, dtype=np.float32)
+
+
+def job(job_id, audio=CLIP, **options):
+    return job_id, audio, {"fp16": False, **options}
+
+
+def ids(jobs):
+    return [job_id for job_id, _, _ in jobs]
+
+
+def test_clips_batch_across_sessions_despite_prompts():
+    # Each streaming session prompts with its own transcript
+    waiting = deque([job(1, initial_prompt="Alice so far"), job(2, initial_prompt="Bob so far"), job(3)])
+    assert ids(take_batch(waiting, 4)) == [1, 2, 3]
+    assert not waiting
+
+
+def test_batches_keep_one_language_and_respect_size():
+    waiting = deque([job(1), job(2, language="fr"), job(3), job(4), job(5)])
+    assert ids(take_batch(waiting, 3)) == [1, 3, 4]
+    assert ids(waiting) == [2, 5]
+
+
+def test_long_clips_and_extra_options_are_not_batched():
+    long_clip = np.zeros(31 * SAMPLE_RATE, dtype=np.float32)
+    waiting = deque([job(1, audio=long_clip), job(2), job(3, temperature=0.2), job(4)])
+    assert ids(take_batch(waiting, 4)) == [1]
+    assert ids(take_batch(waiting, 4)) == [2, 4]
+    assert ids(take_batch(waiting, 1)) == [3]
@@ -0,0 +1,159 @@
+import numpy as np
+
+SAMPLE_RATE = 16000  # Whisper expects 16 kHz mono float32
+
+# Energy VAD settings
+VAD_FRAME_SECONDS = 0.03
+VAD_MIN_DB = -50.0           # frames quieter than this are always silence
+VAD_NOISE_MARGIN_DB = 12.0   # speech must be this far above the noise floor
+VAD_PAD_SECONDS = 0.2        # kept around speech so word onsets/tails aren't clipped
+VAD_MAX_GAP_SECONDS = 0.5    # longer pauses inside speech are shortened to this
+
+
+def to_float32(samples):
+    """int16 PCM -> float32 in [-1, 1]; float input is passed through as float32."""
+    samples = np.asarray(samples)
+    if samples.dtype == np.int16:
+        return samples.astype(np.float32) / 32768.0
+    return samples.astype(np.float32, copy=False)
+
+
+def to_int16(samples):
+    """float32 in [-1, 1] -> int16 PCM (clipped); int16 input is returned as is."""
+    samples = np.asarray(samples)
+    if samples.dtype == np.int16:
+        return samples
+    return (np.clip(samples, -1.0, 1.0) * 32767.0).astype(np.int16)
+
+
+def frame_to_mono(frame):
+    """Decode a WebRTC (PyAV) audio frame to mono float32 at the frame's own sample rate."""
+    samples = to_float32(frame.to_ndarray())
+    channels = len(frame.layout.channels)
+    if channels > 1:
+        if frame.format.is_planar:
+            samples = samples.reshape(channels, -1).mean(axis=0)
+        else:
+            # Packed formats interleave channels: L R L R ...
+            samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples.reshape(-1)
+
+
+def lowpass_taps(cutoff, num_taps=63):
+    """Hamming-windowed sinc low-pass; cutoff as a fraction of the input rate (0-0.5)."""
+    n = np.arange(num_taps) - (num_taps - 1) / 2
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(num_taps)
+    return (taps / taps.sum()).astype(np.float32)
+
+
+class Resampler:
+    """
+    Streaming resampler for consecutive chunks of one mono signal.
+
+    Downsampling low-pass filters first (anti-aliasing), then samples the
+    filtered signal at the output rate by linear interpolation. Filter
+    history and the fractional read position carry over between chunks, so
+    20 ms WebRTC frames resample without clicks at their boundaries.
+    """
+
+    def __init__(self, from_rate, to_rate=SAMPLE_RATE, num_taps=63):
+        self.from_rate = from_rate
+        self.to_rate = to_rate
+        self.step = from_rate / to_rate
+        self.taps = lowpass_taps(0.45 / self.step, num_taps) if from_rate > to_rate else None
+        self._history = np.zeros(num_taps - 1 if self.taps is not None else 0, dtype=np.float32)
+        self._last = np.float32(0.0)
+        self._pos = 0.0  # next output time, in input samples from the start of the next chunk
+
+    def process(self, samples):
+        samples = np.asarray(samples, dtype=np.float32)
+        if self.from_rate == self.to_rate or len(samples) == 0:
+            return samples
+        if self.taps is not None:
+            padded = np.concatenate([self._history, samples])
+            self._history = padded[len(padded) - len(self._history):]
+            samples = np.convolve(padded, self.taps, mode="valid").astype(np.float32)
+        # Index -1 is the previous chunk's last sample, so interpolation spans the boundary
+        times = np.arange(self._pos, len(samples) - 1 + 1e-9, self.step)
+        out = np.interp(times, np.arange(-1, len(samples)), np.concatenate([[self._last], samples]))
+        self._pos = (times[-1] + self.step if len(times) else self._pos) - len(samples)
+        self._last = samples[-1]
+        return out.astype(np.float32)
+
+
+def resample(samples, from_rate, to_rate=SAMPLE_RATE):
+    """Resample a whole mono clip."""
+    return Resampler(from_rate, to_rate).process(samples)
+
+
+class AudioFrontEnd:
+    """Turns incoming WebRTC frames into 16 kHz mono float32, whatever rate/layout they arrive in."""
+
+    def __init__(self, to_rate=SAMPLE_RATE):
+        self.to_rate = to_rate
+        self._resampler = None
+
+    def convert(self, frame):
+        rate = getattr(frame, "sample_rate", None) or self.to_rate
+        if self._resampler is None or self._resampler.from_rate != rate:
+            self._resampler = Resampler(rate, self.to_rate)
+        return self._resampler.process(frame_to_mono(frame))
+
+
+def frame_energy_db(audio, frame_len):
+    """RMS level in dBFS of each full frame_len chunk."""
+    frames = len(audio) // frame_len
+    if frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    chunks = audio[:frames * frame_len].reshape(frames, frame_len).astype(np.float32)
+    rms = np.sqrt(np.mean(chunks * chunks, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def speech_mask(audio, sample_rate=SAMPLE_RATE):
+    """Per-frame speech flags from an adaptive energy threshold, padded around speech."""
+    frame_len = int(VAD_FRAME_SECONDS * sample_rate)
+    energy = frame_energy_db(audio, frame_len)
+    if len(energy) == 0:
+        return energy.astype(bool), frame_len
+    noise_floor = np.percentile(energy, 10)
+    if energy.max() - noise_floor < VAD_NOISE_MARGIN_DB:
+        # Flat window: no floor to measure speech against. Quiet means room noise only;
+        # loud means continuous speech (e.g. mic AGC levelling it out), so keep it all
+        speech = energy.max() >= VAD_MIN_DB + VAD_NOISE_MARGIN_DB
+        return np.full(len(energy), speech, dtype=bool), frame_len
+    # Never below floor + margin: with a noisy floor (-40 dBFS laptop mics) anything lower marks every frame as speech
+    threshold = max(VAD_MIN_DB, noise_floor + VAD_NOISE_MARGIN_DB)
+    mask = energy > threshold
+    pad = int(round(VAD_PAD_SECONDS / VAD_FRAME_SECONDS))
+    if pad and mask.any():
+        mask = np.convolve(mask, np.ones(2 * pad + 1), mode="same") > 0
+    return mask, frame_len
+
+
+def trim_silence(audio, sample_rate=SAMPLE_RATE, max_gap_seconds=VAD_MAX_GAP_SECONDS):
+    """
+    Drop leading/trailing silence and shorten long pauses.
+
+    Returns (trimmed_audio, seconds_removed). All-silent audio comes back
+    empty, so callers can skip inference entirely.
+    """
+    audio = np.asarray(audio)
+    mask, frame_len = speech_mask(audio, sample_rate)
+    if not mask.any():
+        return audio[:0], len(audio) / sample_rate
+    # Samples past the last full frame inherit the last frame's decision
+    keep = np.repeat(mask, frame_len)
+    keep = np.concatenate([keep, np.full(len(audio) - len(keep), mask[-1])])
+
+    # Silent runs: drop at the edges, shorten inside
+    max_gap = int(max_gap_seconds * sample_rate)
+    edges = np.flatnonzero(np.diff(np.concatenate([[1], keep.astype(np.int8), [1]])))
+    for start, stop in zip(edges[::2], edges[1::2]):
+        if start == 0 or stop == len(audio):
+            continue
+        keep[start:stop] = True
+        if stop - start > max_gap:
+            keep[start + max_gap // 2:stop - (max_gap - max_gap // 2)] = False
+    trimmed = audio[keep]
+    return trimmed, (len(audio) - len(trimmed)) / sample_rate
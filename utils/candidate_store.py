@@ -0,0 +1,285 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from utils.metrics import span
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "candidates.db")
+SORT_COLUMNS = ("final_score", "resume_score", "created_at")
+CGPA_TO_PERCENT = 9.5  # CBSE convention for 10-point CGPAs given as 10th/PU marks
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def jd_hash(jd):
+    """Key for a job description (whitespace-insensitive)."""
+    return hashlib.sha1(" ".join((jd or "").split()).encode("utf-8")).hexdigest()[:16]
+
+
+def candidate_key(jd, resume_text):
+    """One leaderboard entry per resume per JD."""
+    return hashlib.sha256(f"{jd_hash(jd)}\n{resume_text or ''}".encode("utf-8")).hexdigest()
+
+
+def parse_number(value):
+    match = _NUMBER.search(str(value or ""))
+    return float(match.group(0)) if match else None
+
+
+def marks_percent(value):
+    """'92%', '92' -> 92.0; a 10-point CGPA like '9.1' -> 86.45; missing -> None."""
+    number = parse_number(value)
+    if number is None:
+        return None
+    return round(number * CGPA_TO_PERCENT, 2) if number <= 10 else number
+
+
+def cgpa(value):
+    """Engineering CGPA on a 10-point scale; percentages are divided by 10."""
+    number = parse_number(value)
+    if number is None:
+        return None
+    return number if number <= 10 else round(number / 10, 2)
+
+
+def normalize_skill(skill):
+    return " ".join(str(skill).lower().split())
+
+
+class CandidateStore:
+    """
+    Local candidate repository (SQLite, WAL) for ranking and browsing past candidates.
+
+    Listing columns live in `candidates`; resume text, screening details and
+    answers live in `candidate_documents` and are only read by get_document(),
+    so leaderboard queries never touch large blobs. Skills are normalized
+    into `candidate_skills` for indexed filtering. page() uses keyset
+    pagination over (sort column, id) indexes, so every page costs the same
+    however deep it is.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                jd_hash TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                jd_text TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS candidates (
+                id INTEGER PRIMARY KEY,
+                candidate_key TEXT UNIQUE NOT NULL,
+                jd_hash TEXT NOT NULL,
+                name TEXT NOT NULL,
+                resume_score INTEGER NOT NULL,
+                interview_score INTEGER,
+                final_score INTEGER,
+                match_percentage TEXT,
+                tenth_pct REAL,
+                pu_pct REAL,
+                engineering_cgpa REAL,
+                summary TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS candidate_skills (
+                skill TEXT NOT NULL,
+                candidate_id INTEGER NOT NULL,
+                PRIMARY KEY (skill, candidate_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS candidate_documents (
+                candidate_id INTEGER PRIMARY KEY,
+                resume_text TEXT,
+                details TEXT,
+                answers TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_candidate_skills_candidate ON candidate_skills(candidate_id);
+            CREATE INDEX IF NOT EXISTS idx_candidates_final ON candidates(final_score DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS idx_candidates_resume ON candidates(resume_score DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS idx_candidates_created ON candidates(created_at DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS idx_candidates_jd_final ON candidates(jd_hash, final_score DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS idx_candidates_jd_resume ON candidates(jd_hash, resume_score DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS idx_candidates_jd_created ON candidates(jd_hash, created_at DESC, id DESC);
+            """
+        )
+        self._conn.commit()
+
+    # --- writes ---
+
+    def _save(self, jd, resume_text, details, resume_score=None, interview_score=None, final_score=None,
+              answers=None, now=None):
+        now = now or time.time()
+        jhash = jd_hash(jd)
+        self._conn.execute(
+            "INSERT OR IGNORE INTO jobs (jd_hash, title, jd_text, created_at) VALUES (?, ?, ?, ?)",
+            (jhash, (jd or "").strip().split("\n")[0][:80] or "Untitled job", jd or "", now),
+        )
+        details = details or {}
+        score = resume_score if resume_score is not None else details.get("score")
+        key = candidate_key(jd, resume_text)
+        self._conn.execute(
+            """INSERT INTO candidates (candidate_key, jd_hash, name, resume_score, interview_score, final_score,
+                   match_percentage, tenth_pct, pu_pct, engineering_cgpa, summary, created_at, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(candidate_key) DO UPDATE SET
+                   name = excluded.name,
+                   resume_score = excluded.resume_score,
+                   interview_score = COALESCE(excluded.interview_score, interview_score),
+                   final_score = COALESCE(excluded.final_score, final_score),
+                   match_percentage = excluded.match_percentage,
+                   tenth_pct = excluded.tenth_pct,
+                   pu_pct = excluded.pu_pct,
+                   engineering_cgpa = excluded.engineering_cgpa,
+                   summary = excluded.summary,
+                   updated_at = excluded.updated_at""",
+            (key, jhash, details.get("name") or "Candidate", int(score or 0),
+             interview_score, final_score, details.get("match_percentage"),
+             marks_percent(details.get("10th_marks")), marks_percent(details.get("pu_marks")),
+             cgpa(details.get("engineering_cgpa")), details.get("summary"), now, now),
+        )
+        row_id = self._conn.execute("SELECT id FROM candidates WHERE candidate_key = ?", (key,)).fetchone()[0]
+        self._conn.execute("DELETE FROM candidate_skills WHERE candidate_id = ?", (row_id,))
+        # "skills" holds short names from the screening schema; results stored before it existed only have
+        # free-text "strengths" phrases, which are indexed as-is
+        skills = {normalize_skill(s) for s in details.get("skills") or details.get("strengths") or []
+                  if normalize_skill(s)}
+        self._conn.executemany("INSERT OR IGNORE INTO candidate_skills (skill, candidate_id) VALUES (?, ?)",
+                               [(skill, row_id) for skill in skills])
+        self._conn.execute(
+            """INSERT INTO candidate_documents (candidate_id, resume_text, details, answers) VALUES (?, ?, ?, ?)
+               ON CONFLICT(candidate_id) DO UPDATE SET
+                   resume_text = excluded.resume_text,
+                   details = excluded.details,
+                   answers = COALESCE(excluded.answers, answers)""",
+            (row_id, resume_text, json.dumps(details, default=str),
+             json.dumps(answers, default=str) if answers is not None else None),
+        )
+        return row_id
+
+    def save(self, jd, resume_text, details, resume_score=None, interview_score=None, final_score=None, answers=None):
+        """
+        Insert or update one candidate (keyed on JD + resume text) and return its id.
+
+        details is the screening result dict (name, marks, skills...).
+        interview_score/final_score/answers left as None keep any stored values,
+        so saving after screening and again after the interview updates one row.
+        """
+        with self._lock, span("store_write", rows=1):
+            row_id = self._save(jd, resume_text, details, resume_score, interview_score, final_score, answers)
+            self._conn.commit()
+        return row_id
+
+    def save_many(self, jd, rows):
+        """Bulk-save (resume_text, details) pairs screened against one JD in a single transaction."""
+        now = time.time()
+        with self._lock, span("store_write", rows=len(rows)):
+            ids = [self._save(jd, text, details, now=now) for text, details in rows]
+            self._conn.commit()
+        return ids
+
+    # --- reads ---
+
+    def _where(self, jd_hash_value, sort, skills, min_cgpa, min_tenth, min_pu, min_score):
+        clauses, params = [], []
+        if jd_hash_value:
+            clauses.append("jd_hash = ?")
+            params.append(jd_hash_value)
+        if sort == "final_score":
+            clauses.append("final_score IS NOT NULL")
+        for skill in {normalize_skill(s) for s in skills or () if normalize_skill(s)}:
+            clauses.append("EXISTS (SELECT 1 FROM candidate_skills s WHERE s.skill = ? AND s.candidate_id = candidates.id)")
+            params.append(skill)
+        score_column = "final_score" if sort == "final_score" else "resume_score"
+        for column, minimum in (("engineering_cgpa", min_cgpa), ("tenth_pct", min_tenth), ("pu_pct", min_pu),
+                                (score_column, min_score)):
+            if minimum:
+                clauses.append(f"{column} >= ?")
+                params.append(minimum)
+        return clauses, params
+
+    def page(self, jd_hash=None, sort="final_score", limit=50, after=None, skills=(), min_cgpa=None,
+             min_tenth=None, min_pu=None, min_score=None):
+        """
+        One page of candidates, best first, without resume text.
+
+        sort is one of SORT_COLUMNS ("final_score" lists only interviewed
+        candidates). after is the cursor returned with the previous page.
+        Returns (rows, next_cursor); next_cursor is None on the last page.
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"sort must be one of {SORT_COLUMNS}")
+        clauses, params = self._where(jd_hash, sort, skills, min_cgpa, min_tenth, min_pu, min_score)
+        if after is not None:
+            clauses.append(f"({sort}, id) < (?, ?)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = (
+            "SELECT id, name, jd_hash, resume_score, interview_score, final_score, match_percentage, "
+            f"tenth_pct, pu_pct, engineering_cgpa, summary, created_at FROM candidates {where} "
+            f"ORDER BY {sort} DESC, id DESC LIMIT ?"
+        )
+        with self._lock, span("store_query") as attrs:
+            cursor = self._conn.execute(sql, params + [limit + 1])
+            columns = [c[0] for c in cursor.description]
+            rows = [dict(zip(columns, r)) for r in cursor.fetchall()]
+            attrs["rows"] = len(rows)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1][sort], rows[-1]["id"])
+        return rows, next_cursor
+
+    def top(self, jd, n=10, sort="final_score"):
+        """Top-n candidates for a job description."""
+        return self.page(jd_hash=jd_hash(jd), sort=sort, limit=n)[0]
+
+    def count(self, jd_hash=None, sort="final_score", skills=(), min_cgpa=None, min_tenth=None, min_pu=None,
+              min_score=None):
+        clauses, params = self._where(jd_hash, sort, skills, min_cgpa, min_tenth, min_pu, min_score)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM candidates {where}", params).fetchone()[0]
+
+    def get_document(self, candidate_id):
+        """Resume text, screening details and answers for one candidate (loaded on demand)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT resume_text, details, answers FROM candidate_documents WHERE candidate_id = ?", (candidate_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "resume_text": row[0] or "",
+            "details": json.loads(row[1]) if row[1] else {},
+            "answers": json.loads(row[2]) if row[2] else [],
+        }
+
+    def get_skills(self, candidate_id):
+        with self._lock:
+            return [r[0] for r in self._conn.execute(
+                "SELECT skill FROM candidate_skills WHERE candidate_id = ? ORDER BY skill", (candidate_id,))]
+
+    def jobs(self):
+        """Job descriptions with at least one candidate, newest first: (jd_hash, title, candidates)."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT j.jd_hash, j.title, (SELECT COUNT(*) FROM candidates c WHERE c.jd_hash = j.jd_hash) "
+                "FROM jobs j ORDER BY j.created_at DESC"
+            ).fetchall()
+
+    def popular_skills(self, limit=50):
+        with self._lock:
+            return [r[0] for r in self._conn.execute(
+                "SELECT skill FROM candidate_skills GROUP BY skill ORDER BY COUNT(*) DESC LIMIT ?", (limit,))]
@@ -0,0 +1,241 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+import numpy as np
+
+from utils.candidate_store import jd_hash
+from utils.metrics import span
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "resume_fingerprints.db")
+# Estimated Jaccard similarity (word 3-gram shingles) at which two resumes count as the same document
+DEFAULT_THRESHOLD = float(os.environ.get("DEDUP_THRESHOLD", "0.8"))
+
+SHINGLE_SIZE = 3
+# Texts with fewer distinct shingles (empty or scanned PDFs, a stray header line) are never fingerprinted:
+# they would all share one text hash and match each other
+MIN_SHINGLES = 20
+NUM_PERM = 128
+# 16 bands x 8 rows: pairs above ~0.75 similarity almost always share a bucket, pairs below ~0.5 rarely do
+LSH_BANDS = 16
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20250101)  # fixed seed: signatures are persisted, so permutations must never change
+_PERM_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+DuplicateMatch = namedtuple("DuplicateMatch", ["doc_id", "kind", "similarity", "resume_text", "result", "first_seen"])
+
+
+def file_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def normalize_text(text):
+    """Lowercase word tokens only, so spacing, punctuation and layout changes don't matter."""
+    return _WORD_RE.findall((text or "").lower())
+
+
+def text_hash(text):
+    return hashlib.sha256(" ".join(normalize_text(text)).encode("utf-8")).hexdigest()
+
+
+def shingles(text, k=SHINGLE_SIZE):
+    """Distinct 31-bit hashes of the word k-grams in text."""
+    words = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in normalize_text(text)), dtype=np.uint64)
+    if len(words) == 0:
+        return words
+    k = min(k, len(words))
+    # Rolling polynomial hash over each window of k word hashes (stays within uint64)
+    hashes = np.zeros(len(words) - k + 1, dtype=np.uint64)
+    for j in range(k):
+        hashes = (hashes * np.uint64(1000003) + words[j:len(words) - k + 1 + j]) & np.uint64(0xFFFFFFFF)
+    return np.unique(hashes % np.uint64(_PRIME))
+
+
+def minhash(text):
+    """MinHash signature (NUM_PERM uint32 values); equal positions estimate Jaccard similarity."""
+    return _signature(shingles(text))
+
+
+def _signature(values):
+    if len(values) == 0:
+        return np.full(NUM_PERM, _PRIME, dtype=np.uint32)
+    permuted = (_PERM_A[:, None] * values[None, :] + _PERM_B[:, None]) % np.uint64(_PRIME)
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def similarity(sig_a, sig_b):
+    return float(np.mean(sig_a == sig_b))
+
+
+def lsh_buckets(signature, bands=LSH_BANDS):
+    """(band, bucket) keys; resumes sharing any key are candidate near-duplicates."""
+    rows = len(signature) // bands
+    return [
+        (band, int.from_bytes(hashlib.blake2b(signature[band * rows:(band + 1) * rows].tobytes(), digest_size=8).digest(),
+                              "big", signed=True))
+        for band in range(bands)
+    ]
+
+
+class ResumeIndex:
+    """
+    Fingerprints of every resume screened so far (SQLite, WAL), with their scoring results per JD.
+
+    A resubmission is recognized three ways, cheapest first: the same PDF
+    bytes (sha256, so text extraction can be skipped too), the same text
+    after normalization, or a near-duplicate found through MinHash LSH
+    buckets, which touches only the few resumes sharing a bucket rather than
+    the whole history. Matches carry the stored result for the JD, if any.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, threshold=DEFAULT_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._hits = {"file": 0, "text": 0, "near": 0}
+        self._lookups = 0
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS resumes (
+                doc_id INTEGER PRIMARY KEY,
+                text_hash TEXT UNIQUE NOT NULL,
+                resume_text TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS resume_files (
+                file_hash TEXT PRIMARY KEY,
+                doc_id INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS lsh_buckets (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                doc_id INTEGER NOT NULL,
+                PRIMARY KEY (band, bucket, doc_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS screenings (
+                doc_id INTEGER NOT NULL,
+                jd_hash TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (doc_id, jd_hash)
+            ) WITHOUT ROWID;
+            """
+        )
+        self._conn.commit()
+
+    def _result(self, doc_id, jd):
+        # Caller holds self._lock
+        if jd is None:
+            return None
+        row = self._conn.execute("SELECT result FROM screenings WHERE doc_id = ? AND jd_hash = ?",
+                                 (doc_id, jd_hash(jd))).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _match(self, doc_id, kind, score, jd):
+        # Caller holds self._lock
+        text, created_at = self._conn.execute(
+            "SELECT resume_text, created_at FROM resumes WHERE doc_id = ?", (doc_id,)).fetchone()
+        self._hits[kind] += 1
+        return DuplicateMatch(doc_id, kind, score, text, self._result(doc_id, jd), created_at)
+
+    def find_file(self, data, jd=None):
+        """Match on the exact PDF bytes; the stored text means the upload needn't be extracted again."""
+        digest = file_hash(data)
+        with self._lock:
+            self._lookups += 1
+            row = self._conn.execute("SELECT doc_id FROM resume_files WHERE file_hash = ?", (digest,)).fetchone()
+            return self._match(row[0], "file", 1.0, jd) if row else None
+
+    def find(self, text, jd=None):
+        """
+        Best earlier resume matching this text, or None.
+
+        Exact (normalized) text wins; otherwise the LSH candidates at or above
+        the similarity threshold are compared, preferring ones that already
+        have a result for jd. Text too short to fingerprint never matches.
+        """
+        values = shingles(text)
+        if len(values) < MIN_SHINGLES:
+            return None
+        with span("dedup_lookup") as attrs:
+            with self._lock:
+                self._lookups += 1
+                row = self._conn.execute("SELECT doc_id FROM resumes WHERE text_hash = ?", (text_hash(text),)).fetchone()
+                if row:
+                    attrs["duplicate"] = 1
+                    return self._match(row[0], "text", 1.0, jd)
+            signature = _signature(values)
+            with self._lock:
+                candidates = set()
+                for band, bucket in lsh_buckets(signature):
+                    candidates.update(r[0] for r in self._conn.execute(
+                        "SELECT doc_id FROM lsh_buckets WHERE band = ? AND bucket = ?", (band, bucket)))
+                attrs["candidates"] = len(candidates)
+                best = None
+                for doc_id in candidates:
+                    stored = self._conn.execute("SELECT signature FROM resumes WHERE doc_id = ?", (doc_id,)).fetchone()[0]
+                    score = similarity(signature, np.frombuffer(stored, dtype=np.uint32))
+                    if score < self.threshold:
+                        continue
+                    has_result = self._result(doc_id, jd) is not None
+                    if best is None or (has_result, score) > best[0]:
+                        best = ((has_result, score), doc_id)
+                attrs["duplicate"] = int(best is not None)
+                return self._match(best[1], "near", best[0][1], jd) if best else None
+
+    def add(self, text, data=None, jd=None, result=None):
+        """
+        Record a resume (and its PDF bytes and scoring result for jd, when given); returns its doc_id.
+
+        Adding the same text again reuses the existing entry, so call this once
+        after extraction and again once the resume has been scored. Text too
+        short to fingerprint is not recorded and returns None.
+        """
+        values = shingles(text)
+        if len(values) < MIN_SHINGLES:
+            return None
+        key = text_hash(text)
+        with self._lock:
+            row = self._conn.execute("SELECT doc_id FROM resumes WHERE text_hash = ?", (key,)).fetchone()
+        signature = None if row else _signature(values)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT doc_id FROM resumes WHERE text_hash = ?", (key,)).fetchone()
+            if row:
+                doc_id = row[0]
+            else:
+                doc_id = self._conn.execute(
+                    "INSERT INTO resumes (text_hash, resume_text, signature, created_at) VALUES (?, ?, ?, ?)",
+                    (key, text, signature.tobytes(), now),
+                ).lastrowid
+                self._conn.executemany("INSERT OR IGNORE INTO lsh_buckets (band, bucket, doc_id) VALUES (?, ?, ?)",
+                                       [(band, bucket, doc_id) for band, bucket in lsh_buckets(signature)])
+            if data is not None:
+                self._conn.execute("INSERT OR REPLACE INTO resume_files (file_hash, doc_id) VALUES (?, ?)",
+                                   (file_hash(data), doc_id))
+            if jd is not None and result is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO screenings (doc_id, jd_hash, result, created_at) VALUES (?, ?, ?, ?)",
+                    (doc_id, jd_hash(jd), json.dumps(result, default=str), now),
+                )
+            self._conn.commit()
+        return doc_id
+
+    def stats(self):
+        with self._lock:
+            resumes = self._conn.execute("SELECT COUNT(*) FROM resumes").fetchone()[0]
+            return {"resumes": resumes, "lookups": self._lookups, **{f"{k}_hits": v for k, v in self._hits.items()}}
@@ -0,0 +1,55 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+PENDING_FEEDBACK = "⏳ Evaluating in the background..."
+DEFERRED_FEEDBACK = "🕒 Will be graded with all answers at the end of the interview."
+
+# One pool for the whole process; each session only tracks its own futures
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(max_workers=8):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="answer-eval")
+        return _executor
+
+
+class EvaluationQueue:
+    """
+    Per-session tracker for answer evaluations running on a shared worker pool.
+
+    submit() returns immediately; collect() copies finished feedback into the
+    session's answer dicts, so results fill in on the next rerun.
+    """
+
+    def __init__(self):
+        self._futures = {}  # answer index -> Future
+
+    def submit(self, index, evaluate, question, answer, model, use_cache=True):
+        self._futures[index] = _get_executor().submit(evaluate, question, answer, model, use_cache=use_cache)
+
+    @property
+    def pending(self):
+        return sum(1 for f in self._futures.values() if not f.done())
+
+    def collect(self, answers):
+        """Fill in feedback for finished evaluations; returns how many are still running."""
+        for index, future in list(self._futures.items()):
+            if not future.done():
+                continue
+            try:
+                feedback = future.result()
+            except Exception as e:
+                feedback = f"Evaluation failed: {str(e)}"
+            if index < len(answers):
+                answers[index]["feedback"] = feedback
+            del self._futures[index]
+        return self.pending
+
+    def wait(self, answers, timeout=None):
+        """Block until every queued evaluation is done (or timeout), then collect."""
+        wait(list(self._futures.values()), timeout=timeout)
+        return self.collect(answers)
@@ -1,11 +1,19 @@
-import google.generativeai as genai
+import json
+import re
+from utils.llm_cache import cached_generate
+from utils.llm_client import get_client
+from utils.metrics import span
+from utils.prompt_compactor import DEFAULT_ANSWERS_BUDGET, compact_answers, compact_jd, compact_resume, normalize_whitespace, truncate_to_budget
 
-def generate_interview_questions(jd, resume_text):
+def generate_interview_questions(jd, resume_text, use_cache=True, model=None):
     try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        prompt = f"Based on this JD and the candidate's resume, generate exactly 5 relevant behavioral and technical interview questions tailored to the candidate's experience and skills mentioned in the resume:\nJD: {jd}\nResume: {resume_text}\nReturn only the questions, one per line."
-        response = model.generate_content(prompt)
-        questions = [q.strip("- ").strip() for q in response.text.split("\n") if q.strip() and not q.startswith("```")]
+        model = model or get_client()
+        resume, job = compact_resume(resume_text, jd), compact_jd(jd)
+        prompt = f"Based on this JD and the candidate's resume, generate exactly 5 relevant behavioral and technical interview questions tailored to the candidate's experience and skills mentioned in the resume:\nJD: {job.text}\nResume: {resume.text}\nReturn only the questions, one per line."
+        with span("question_generation", prompt_chars=len(prompt), tokens_before=resume.tokens_before + job.tokens_before,
+                  tokens_after=resume.tokens_after + job.tokens_after):
+            text = cached_generate(model, prompt, use_cache=use_cache)
+        questions = [q.strip("- ").strip() for q in text.split("\n") if q.strip() and not q.startswith("```")]
         return questions[:5]
     except Exception as e:
         # Fallback if AI not available
@@ -17,12 +25,41 @@ def generate_interview_questions(jd, resume_text):
             "Why are you interested in this role?",
         ]
 
-def evaluate_answer(question, answer, model):
+def evaluate_answer(question, answer, model, use_cache=True):
     if model is None:
         return "AI unavailable — placeholder feedback. Configure GEMINI_API_KEY to enable evaluation."
     try:
+        answer = truncate_to_budget(normalize_whitespace(answer), DEFAULT_ANSWERS_BUDGET)
         prompt = f"Evaluate this answer to the question.\nQuestion: {question}\nAnswer: {answer}\nGive feedback and score out of 10."
-        response = model.generate_content(prompt)
-        return response.text
+        with span("answer_evaluation", prompt_chars=len(prompt)):
+            return cached_generate(model, prompt, use_cache=use_cache)
     except Exception as e:
         return f"Evaluation failed: {str(e)}"
+
+def evaluate_answers_batch(qa_pairs, model, use_cache=True):
+    """
+    Grade every (question, answer) pair in one model call.
+
+    Returns one feedback string per pair. If the batched reply can't be
+    parsed, falls back to grading each answer separately.
+    """
+    if model is None:
+        return [evaluate_answer(q, a, model) for q, a in qa_pairs]
+    transcript = compact_answers([{"question": q, "answer": a} for q, a in qa_pairs])
+    numbered = transcript.text
+    prompt = (
+        f"Evaluate each of these {len(qa_pairs)} interview answers. For each, give short feedback and a score out of 10.\n"
+        f"{numbered}\n"
+        'Return JSON only: a list with one object per answer, in order, like [{"feedback": "...", "score": 7}]'
+    )
+    try:
+        with span("answer_evaluation_batch", answers=len(qa_pairs), prompt_chars=len(prompt),
+                  tokens_before=transcript.tokens_before, tokens_after=transcript.tokens_after):
+            text = cached_generate(model, prompt, use_cache=use_cache)
+        match = re.search(r"\[.*\]", text, re.S)
+        items = json.loads(match.group(0)) if match else []
+        if len(items) == len(qa_pairs):
+            return [f"{item.get('feedback', '').strip()}\n\nScore: {item.get('score', 'N/A')}/10" for item in items]
+    except Exception:
+        pass
+    return [evaluate_answer(q, a, model, use_cache=use_cache) for q, a in qa_pairs]
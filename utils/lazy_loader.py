@@ -0,0 +1,39 @@
+import importlib
+import os
+import threading
+import time
+
+# module name -> seconds spent importing it (first import only)
+IMPORT_TIMES = {}
+_import_lock = threading.Lock()
+
+WHISPER_MODEL_SIZES = ("tiny", "tiny.en", "base", "base.en", "small", "small.en", "medium")
+DEFAULT_WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "base")
+
+
+def timed_import(name):
+    """importlib.import_module, recording how long the first import took."""
+    with _import_lock:
+        if name in IMPORT_TIMES:
+            return importlib.import_module(name)
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        IMPORT_TIMES[name] = time.perf_counter() - start
+        return module
+
+
+class LazyModule:
+    """Module stand-in that imports the real module on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = timed_import(self._name)
+        return getattr(self._module, attr)
+
+
+def lazy_import(name):
+    return LazyModule(name)
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "llm_cache.db")
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_TTL = 30 * 24 * 3600  # seconds
+
+
+def response_text(response):
+    """Pull the generated text out of a Gemini response, whatever shape it comes back in."""
+    try:
+        if response.text:
+            return response.text
+    except Exception:
+        pass
+    try:
+        return response.candidates[0].content.parts[0].text
+    except Exception:
+        return getattr(response, "output_text", "") or ""
+
+
+def model_name_of(model):
+    return getattr(model, "model_name", None) or type(model).__name__
+
+
+def normalize_prompt(prompt):
+    # Collapse whitespace so re-indented or re-wrapped prompts still hit the cache
+    return " ".join(str(prompt).split())
+
+
+class LLMCache:
+    """
+    Content-addressed on-disk cache for LLM responses (SQLite).
+
+    Keys are a SHA-256 of the model name, the normalized prompt and any extra
+    generation parameters. Entries expire after their TTL and the least
+    recently used ones are evicted once max_entries is exceeded.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, default_ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache(last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model_name, prompt, **params):
+        payload = json.dumps(
+            {"model": model_name, "prompt": normalize_prompt(prompt), "params": params},
+            sort_keys=True, default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or (row[1] is not None and row[1] < now):
+                if row is not None:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key, response, model_name="", ttl=None):
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, response, created_at, expires_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, response, now, expires_at, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM llm_cache WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide cache instance (created on first use)."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache()
+        return _default_cache
+
+
+def cached_generate(model, prompt, use_cache=True, ttl=None, cache=None, validate=None, **kwargs):
+    """
+    model.generate_content(prompt, **kwargs) returning text, served from the cache when possible.
+
+    Extra kwargs (e.g. generation_config) are passed through and are part of the cache key.
+    use_cache=False skips both the lookup and the store for this call.
+    Empty responses, exceptions and responses that validate(text) raises on are never cached.
+    """
+    if not use_cache:
+        text = response_text(model.generate_content(prompt, **kwargs))
+        if validate:
+            validate(text)
+        return text
+
+    cache = cache or get_cache()
+    name = model_name_of(model)
+    key = cache.make_key(name, prompt, **kwargs)
+    text = cache.get(key)
+    if text is not None:
+        return text
+
+    text = response_text(model.generate_content(prompt, **kwargs))
+    if validate:
+        validate(text)
+    if text:
+        cache.set(key, text, model_name=name, ttl=ttl)
+    return text
@@ -0,0 +1,268 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from utils.lazy_loader import lazy_import
+from utils.metrics import percentile, span
+
+genai = lazy_import("google.generativeai")
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+DEFAULT_RPM = int(os.environ.get("GEMINI_RPM", "60"))
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get("GEMINI_MAX_CONCURRENCY", "8"))
+
+# google.api_core exception names worth retrying (matched by name so the SDK stays lazily imported)
+RETRYABLE_ERRORS = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "DeadlineExceeded",
+    "InternalServerError", "Aborted", "RetryError",
+}
+
+
+def _usage(prompt, response):
+    """Token counts and payload size for metrics (rough chars/4 estimate if the SDK reports no usage)."""
+    try:
+        text = response.text or ""
+    except Exception:
+        text = ""
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", None)
+    output_tokens = getattr(usage, "candidates_token_count", None)
+    return {
+        "response_bytes": len(text.encode("utf-8")),
+        "prompt_tokens": prompt_tokens if prompt_tokens is not None else len(str(prompt)) // 4,
+        "output_tokens": output_tokens if output_tokens is not None else len(text) // 4,
+    }
+
+
+def is_retryable(error):
+    if isinstance(error, (TimeoutError, FutureTimeout, ConnectionError)):
+        return True
+    return type(error).__name__ in RETRYABLE_ERRORS
+
+
+class TokenBucket:
+    """Blocking token-bucket rate limiter: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1.0):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ClientStats:
+    """Thread-safe call/latency/error counters for one client."""
+
+    def __init__(self, window=500):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.latencies = deque(maxlen=window)
+
+    def record(self, seconds=None, error=None, retry=False):
+        with self._lock:
+            if retry:
+                self.retries += 1
+                return
+            self.calls += 1
+            if seconds is not None:
+                self.latencies.append(seconds)
+            if error is not None:
+                self.errors += 1
+                if isinstance(error, (TimeoutError, FutureTimeout)):
+                    self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "p50_seconds": percentile(latencies, 0.50),
+            "p95_seconds": percentile(latencies, 0.95),
+        }
+
+
+class GeminiClient:
+    """
+    Shared wrapper around a Gemini GenerativeModel.
+
+    Quacks like a GenerativeModel (generate_content, model_name), so it can be
+    passed anywhere the utils expect a model, and adds:
+    - a token-bucket rate limit (requests_per_minute)
+    - a cap on concurrent in-flight requests (max_concurrency)
+    - per-call timeouts (passed to the SDK as request_options, so a hung
+      request is aborted rather than left holding a thread) and
+      exponential-backoff retries on transient errors
+    - submit()/generate_many()/generate_async() for concurrent use
+    - latency and error counters via stats()
+
+    Pass `model` (e.g. a StubModel) to run without the SDK or network.
+    """
+
+    def __init__(self, api_key=None, model_name=DEFAULT_MODEL, model=None,
+                 requests_per_minute=DEFAULT_RPM, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 timeout=60.0, max_retries=3, backoff=1.0, max_backoff=30.0):
+        self.api_key = api_key
+        self.model_name = getattr(model, "model_name", None) or model_name
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._model = model
+        self._model_lock = threading.Lock()
+        self._limiter = TokenBucket(requests_per_minute / 60.0, capacity=max(1, max_concurrency))
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        # Raw SDK calls run here, one thread per concurrency slot, so a call never waits
+        # for a thread (which would eat into its timeout). Only SDK calls honour
+        # request_options; a model that ignores it and hangs keeps its thread.
+        # submit() work runs on a separate pool so it never waits on itself
+        self._call_pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="gemini-call")
+        self._submit_pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="gemini-submit")
+        self._stats = ClientStats()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    if self.api_key:
+                        genai.configure(api_key=self.api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def _call_once(self, prompt, kwargs):
+        self._limiter.acquire()
+        model = self.model
+        grace = 0.0
+        if type(model).__module__.startswith("google.generativeai"):
+            # Let the SDK enforce the deadline itself so the worker thread is freed too;
+            # the grace period means its timeout normally fires before ours
+            kwargs = {"request_options": {"timeout": self.timeout}, **kwargs}
+            grace = 5.0
+        with self._slots:
+            future = self._call_pool.submit(model.generate_content, prompt, **kwargs)
+            try:
+                return future.result(timeout=self.timeout + grace)
+            except FutureTimeout:
+                raise TimeoutError(f"Gemini call exceeded {self.timeout}s")
+
+    def generate_content(self, prompt, **kwargs):
+        with span("gemini_call", prompt_bytes=len(str(prompt).encode("utf-8"))) as attrs:
+            response = self._generate_with_retries(prompt, kwargs)
+            attrs.update(_usage(prompt, response))
+            return response
+
+    def _generate_with_retries(self, prompt, kwargs):
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self._call_once(prompt, kwargs)
+                self._stats.record(time.perf_counter() - start)
+                return response
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    self._stats.record(time.perf_counter() - start, error=e)
+                    raise
+                self._stats.record(retry=True)
+                time.sleep(min(self.max_backoff, self.backoff * (2 ** attempt)))
+                attempt += 1
+
+    def submit(self, prompt, **kwargs):
+        """Queue a call and return a concurrent.futures.Future of the response."""
+        return self._submit_pool.submit(self.generate_content, prompt, **kwargs)
+
+    def generate_many(self, prompts, **kwargs):
+        """Run prompts concurrently; returns responses (or the raised exception) in input order."""
+        futures = [self.submit(p, **kwargs) for p in prompts]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def generate_async(self, prompt, **kwargs):
+        return await asyncio.wrap_future(self.submit(prompt, **kwargs))
+
+    def stats(self):
+        return self._stats.snapshot()
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    """
+    Deterministic offline stand-in for a GenerativeModel.
+
+    responder(prompt) -> text decides the output (default: a stable digest of
+    the prompt). latency adds a fixed delay; the first `fail_times` calls
+    raise `error` to exercise retry paths.
+    """
+
+    def __init__(self, responder=None, latency=0.0, fail_times=0, error=None, model_name="stub-model"):
+        self.model_name = model_name
+        self.responder = responder or (lambda p: "stub response " + hashlib.sha1(str(p).encode()).hexdigest()[:12])
+        self.latency = latency
+        self.fail_times = fail_times
+        self.error = error or ConnectionError("stub failure")
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, **kwargs):
+        with self._lock:
+            self.calls += 1
+            fail = self.calls <= self.fail_times
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise self.error
+        return StubResponse(self.responder(prompt))
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def configure(api_key=None, model_name=DEFAULT_MODEL, **settings):
+    """Create the process-wide client (replacing any previous one) and return it."""
+    global _default_client
+    with _default_client_lock:
+        _default_client = GeminiClient(api_key=api_key, model_name=model_name, **settings)
+        return _default_client
+
+
+def get_client():
+    """Process-wide client; built from GEMINI_API_KEY in the environment if configure() was never called."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = GeminiClient(api_key=os.environ.get("GEMINI_API_KEY"))
+        return _default_client
@@ -0,0 +1,125 @@
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+DEFAULT_WINDOW = 2000  # samples kept per stage
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class MetricsStore:
+    """
+    In-process store of stage timings.
+
+    Keeps the last `window` samples per stage for percentiles, plus running
+    totals (count, errors, seconds and any numeric attributes such as token
+    counts or payload bytes) since startup.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._counts = defaultdict(int)
+        self._errors = defaultdict(int)
+        self._seconds = defaultdict(float)
+        self._totals = defaultdict(lambda: defaultdict(float))
+
+    def record(self, stage, seconds, error=False, **attrs):
+        with self._lock:
+            self._samples[stage].append(seconds)
+            self._counts[stage] += 1
+            self._seconds[stage] += seconds
+            if error:
+                self._errors[stage] += 1
+            for key, value in attrs.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self._totals[stage][key] += value
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._errors.clear()
+            self._seconds.clear()
+            self._totals.clear()
+
+    def summary(self):
+        """Per-stage count, error rate, latency percentiles and attribute totals."""
+        with self._lock:
+            stages = {stage: (sorted(samples), self._counts[stage], self._errors[stage],
+                              self._seconds[stage], dict(self._totals[stage]))
+                      for stage, samples in self._samples.items()}
+        out = {}
+        for stage, (latencies, count, errors, seconds, totals) in sorted(stages.items()):
+            out[stage] = {
+                "count": count,
+                "errors": errors,
+                "error_rate": errors / count if count else 0.0,
+                "p50": percentile(latencies, 0.50),
+                "p95": percentile(latencies, 0.95),
+                "p99": percentile(latencies, 0.99),
+                "mean": seconds / count if count else 0.0,
+                "total_seconds": seconds,
+                "totals": totals,
+            }
+        return out
+
+    def to_json(self):
+        return json.dumps({"generated_at": time.time(), "stages": self.summary()}, indent=2)
+
+    def to_prometheus(self, prefix="talentflow"):
+        """Prometheus text exposition format (summary quantiles over the recent window)."""
+        lines = [
+            f"# HELP {prefix}_stage_seconds Stage latency in seconds.",
+            f"# TYPE {prefix}_stage_seconds summary",
+        ]
+        summary = self.summary()
+        for stage, s in summary.items():
+            for q, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+                lines.append(f'{prefix}_stage_seconds{{stage="{stage}",quantile="{q}"}} {s[key]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {s["total_seconds"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {s["count"]}')
+        lines.append(f"# TYPE {prefix}_stage_errors_total counter")
+        for stage, s in summary.items():
+            lines.append(f'{prefix}_stage_errors_total{{stage="{stage}"}} {s["errors"]}')
+        lines.append(f"# TYPE {prefix}_stage_attribute_total counter")
+        for stage, s in summary.items():
+            for key, value in sorted(s["totals"].items()):
+                lines.append(f'{prefix}_stage_attribute_total{{stage="{stage}",attribute="{key}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+
+store = MetricsStore()
+
+
+@contextmanager
+def span(stage, **attrs):
+    """
+    Time a block and record it under `stage`.
+
+    Yields the attrs dict so the block can add numbers it only learns
+    while running (token counts, bytes, pages...). Exceptions are recorded
+    as errors and re-raised.
+    """
+    start = time.perf_counter()
+    error = False
+    try:
+        yield attrs
+    except BaseException:
+        error = True
+        raise
+    finally:
+        store.record(stage, time.perf_counter() - start, error=error, **attrs)
+
+
+def record(stage, seconds, error=False, **attrs):
+    store.record(stage, seconds, error=error, **attrs)
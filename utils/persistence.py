@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.metrics import span
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "candidates.db")
+
+
+def make_idempotency_key(*parts):
+    """Stable key for a record, so saving the same candidate twice uploads it once."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LocalBackend:
+    """In-memory stand-in for the upstream table (tests, offline runs)."""
+
+    def __init__(self, fail_times=0):
+        self.rows = {}
+        self.batches = 0
+        self.fail_times = fail_times
+
+    def insert_many(self, rows):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("local backend failure")
+        self.batches += 1
+        for row in rows:
+            self.rows.setdefault(row["idempotency_key"], row)
+
+
+class SupabaseBackend:
+    """
+    Bulk upsert into a Supabase table keyed on idempotency_key.
+
+    client_factory is called on first use so the Supabase SDK stays lazily loaded.
+    """
+
+    def __init__(self, client_factory, table="candidates"):
+        self.client_factory = client_factory
+        self.table = table
+
+    def insert_many(self, rows):
+        client = self.client_factory()
+        if client is None:
+            raise RuntimeError("Supabase admin client not configured")
+        client.table(self.table).upsert(rows, on_conflict="idempotency_key", ignore_duplicates=True).execute()
+
+
+class CandidateOutbox:
+    """
+    Local-first candidate persistence.
+
+    enqueue() writes the record to a SQLite outbox (WAL mode) and returns at
+    once; a background flusher bulk-inserts pending records upstream in
+    batches, retrying failed batches with exponential backoff. Records stay
+    in the outbox until the backend accepts them, so nothing is lost if the
+    backend is missing or unreachable.
+    """
+
+    def __init__(self, backend=None, path=DEFAULT_DB_PATH, batch_size=50, flush_interval=5.0,
+                 backoff=2.0, max_backoff=300.0):
+        self.backend = backend
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY,
+                idempotency_key TEXT UNIQUE NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                sent_at REAL,
+                context TEXT
+            )"""
+        )
+        # Outboxes created before the context column existed
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")]
+        if "context" not in columns:
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN context TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox(sent_at, next_attempt_at)")
+        self._conn.commit()
+
+    def enqueue(self, record, idempotency_key=None, context=None):
+        """
+        Store a record for upload and return its idempotency key (duplicates are ignored).
+
+        context is kept locally only (e.g. resume text and answers for re-rendering reports).
+        """
+        key = idempotency_key or make_idempotency_key(record)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO outbox (idempotency_key, payload, created_at, context) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(record, default=str), time.time(),
+                 json.dumps(context, default=str) if context is not None else None),
+            )
+            self._conn.commit()
+        self._wake.set()
+        return key
+
+    def flush(self):
+        """Send one batch of due records upstream; returns how many were sent."""
+        if self.backend is None:
+            return 0
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, idempotency_key, payload, attempts FROM outbox "
+                "WHERE sent_at IS NULL AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (now, self.batch_size),
+            ).fetchall()
+        if not rows:
+            return 0
+
+        batch = [dict(json.loads(payload), idempotency_key=key) for _, key, payload, _ in rows]
+        try:
+            with span("db_insert", rows=len(batch)):
+                self.backend.insert_many(batch)
+        except Exception as e:
+            self.last_error = str(e)
+            with self._lock:
+                self._conn.executemany(
+                    "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                    [
+                        (attempts + 1, now + min(self.max_backoff, self.backoff * (2 ** attempts)), str(e), row_id)
+                        for row_id, _, _, attempts in rows
+                    ],
+                )
+                self._conn.commit()
+            return 0
+
+        self.last_error = None
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET sent_at = ?, attempts = attempts + 1, last_error = NULL WHERE id = ?",
+                [(time.time(), row_id) for row_id, _, _, _ in rows],
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def flush_all(self):
+        sent = 0
+        while True:
+            n = self.flush()
+            if not n:
+                return sent
+            sent += n
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush_all()
+            except Exception as e:
+                self.last_error = str(e)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="outbox-flusher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, flush=True):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if flush:
+            self.flush_all()
+
+    def list_records(self, limit=500):
+        """Most recent stored records (sent or not), each as payload + local context."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT idempotency_key, payload, context FROM outbox ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [
+            {"idempotency_key": key, "record": json.loads(payload), "context": json.loads(context) if context else {}}
+            for key, payload, context in rows
+        ]
+
+    def status(self):
+        with self._lock:
+            pending, sent = self._conn.execute(
+                "SELECT SUM(sent_at IS NULL), SUM(sent_at IS NOT NULL) FROM outbox"
+            ).fetchone()
+        return {"pending": pending or 0, "sent": sent or 0, "last_error": self.last_error}
@@ -0,0 +1,192 @@
+import os
+import re
+from collections import namedtuple
+
+from utils.metrics import span
+from utils.relevance import tokenize
+
+# Token budgets per prompt input (rough tokens, see estimate_tokens); None disables trimming
+DEFAULT_RESUME_BUDGET = int(os.environ.get("PROMPT_RESUME_TOKENS", "1500"))
+DEFAULT_JD_BUDGET = int(os.environ.get("PROMPT_JD_TOKENS", "600"))
+DEFAULT_ANSWERS_BUDGET = int(os.environ.get("PROMPT_ANSWERS_TOKENS", "800"))
+
+Section = namedtuple("Section", ["kind", "text"])
+Compacted = namedtuple("Compacted", ["text", "tokens_before", "tokens_after", "kept", "dropped"])
+
+# Heading words per section kind, checked in order so "Academic Projects" is projects, not education
+SECTION_ALIASES = [
+    ("projects", ("project", "projects")),
+    ("experience", ("experience", "employment", "internship", "internships", "work", "history")),
+    ("skills", ("skills", "skill", "technologies", "tech", "stack", "competencies", "tools")),
+    ("education", ("education", "academic", "academics", "qualification", "qualifications")),
+    ("certifications", ("certification", "certifications", "courses", "training")),
+    ("achievements", ("achievements", "awards", "honors", "honours", "activities", "extracurricular")),
+    ("summary", ("summary", "objective", "profile", "about", "career")),
+    ("boilerplate", ("declaration", "references", "hobbies", "interests", "personal")),
+]
+# Words that may appear in a heading alongside the alias ("Technical Skills", "Education Details")
+HEADING_FILLER = frozenset(
+    "technical professional key core relevant other and me my details information summary of".split()
+)
+_HEADING_VOCAB = HEADING_FILLER.union(*(aliases for _, aliases in SECTION_ALIASES))
+
+# How much a section matters before JD overlap is counted; "header" (name/contact) is always kept
+SECTION_WEIGHTS = {
+    "experience": 1.0, "skills": 1.0, "projects": 0.8, "education": 0.8, "summary": 0.4,
+    "certifications": 0.4, "achievements": 0.3, "other": 0.2, "boilerplate": 0.0,
+}
+
+_BOILERPLATE = re.compile(
+    r"^(page \d+( of \d+)?|\d+ ?/ ?\d+|curriculum vitae|resume|cv|"
+    r"references (are )?(available )?(up)?on request\.?|i hereby declare\b.*)$",
+    re.I,
+)
+_HEADING = re.compile(r"^[\W_]*([A-Za-z][A-Za-z &/]{1,40}?)[\s:\-–|]*$")
+_INLINE_HEADING = re.compile(r"^([A-Za-z][A-Za-z &/]{1,30}?)\s*[:\-–|]\s+(.+)$")
+_SPACES = re.compile(r"[ \t\u00a0]+")
+_SCORE = re.compile(r"(\d+(?:\.\d+)?)\s*/\s*10")
+
+
+def estimate_tokens(text):
+    # Same rough chars/4 estimate the client uses when the SDK reports no usage
+    return len(text or "") // 4
+
+
+def normalize_whitespace(text):
+    """Collapse spaces and drop blank lines, keeping every word (for the candidate's own answers)."""
+    lines = []
+    for raw in (text or "").replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+        line = _SPACES.sub(" ", raw).strip()
+        if line:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def clean_text(text):
+    """Normalize whitespace, drop page numbers/boilerplate lines and repeated header/footer lines."""
+    lines, seen = [], set()
+    for raw in (text or "").replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+        line = _SPACES.sub(" ", raw).strip()
+        if not line or _BOILERPLATE.match(line):
+            continue
+        key = line.lower()
+        if key in seen and len(line) > 3:
+            continue  # repeated page headers/footers, copy-pasted bullets
+        seen.add(key)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _heading_kind(label):
+    # A heading is a short label made only of heading words, e.g. "WORK EXPERIENCE", "Technical Skills"
+    words = re.findall(r"[a-z]+", label.lower())
+    if not words or len(words) > 4 or any(w not in _HEADING_VOCAB for w in words):
+        return None
+    for kind, aliases in SECTION_ALIASES:
+        if any(w in aliases for w in words):
+            return kind
+    return None
+
+
+def split_sections(text):
+    """Split cleaned resume text into Sections; text before the first heading is the "header"."""
+    sections, kind, lines = [], "header", []
+    for line in text.split("\n"):
+        heading = _HEADING.match(line)
+        inline = None if heading else _INLINE_HEADING.match(line)
+        new_kind = _heading_kind((heading or inline).group(1)) if (heading or inline) else None
+        if new_kind:
+            if lines:
+                sections.append(Section(kind, "\n".join(lines)))
+            kind, lines = new_kind, [line]
+        else:
+            lines.append(line)
+    if lines:
+        sections.append(Section(kind, "\n".join(lines)))
+    return sections
+
+
+def _relevance(section, jd_terms):
+    if not jd_terms:
+        return 0.0
+    return len(jd_terms & set(tokenize(section.text))) / len(jd_terms)
+
+
+def truncate_to_budget(text, budget):
+    """Cut text to about `budget` tokens, ending on a line (or word) boundary."""
+    if budget is None or estimate_tokens(text) <= budget:
+        return text
+    limit = budget * 4
+    cut = text[:limit]
+    boundary = max(cut.rfind("\n"), cut.rfind(". "))
+    if boundary < limit // 2:
+        boundary = cut.rfind(" ")
+    return cut[:boundary if boundary > 0 else limit].rstrip()
+
+
+def compact_resume(resume_text, jd="", budget=DEFAULT_RESUME_BUDGET):
+    """
+    Clean a resume and fit it into `budget` tokens.
+
+    Sections are ranked by their weight plus overlap with the JD's terms; the
+    best ones are kept whole, the next one is truncated to fill what's left,
+    and the rest are dropped. Kept sections stay in document order.
+    """
+    with span("compact_resume", tokens_before=estimate_tokens(resume_text)) as attrs:
+        sections = split_sections(clean_text(resume_text))
+        jd_terms = set(tokenize(jd))
+        ranked = sorted(
+            range(len(sections)),
+            key=lambda i: (sections[i].kind != "header",
+                           -(SECTION_WEIGHTS.get(sections[i].kind, 0.2) + _relevance(sections[i], jd_terms))),
+        )
+        chosen, remaining = {}, budget
+        for i in ranked:
+            section = sections[i]
+            if section.kind == "boilerplate":
+                continue
+            cost = estimate_tokens(section.text) + 1
+            if remaining is None or cost <= remaining:
+                chosen[i] = section.text
+                remaining = None if remaining is None else remaining - cost
+            elif remaining > 20:
+                chosen[i] = truncate_to_budget(section.text, remaining)
+                remaining = 0
+        text = "\n".join(chosen[i] for i in sorted(chosen))
+        attrs["tokens_after"] = estimate_tokens(text)
+    kept = [sections[i].kind for i in sorted(chosen)]
+    dropped = [s.kind for i, s in enumerate(sections) if i not in chosen]
+    return Compacted(text, attrs["tokens_before"], attrs["tokens_after"], kept, dropped)
+
+
+def compact_jd(jd, budget=DEFAULT_JD_BUDGET):
+    """Clean a job description and truncate it to `budget` tokens."""
+    with span("compact_jd", tokens_before=estimate_tokens(jd)) as attrs:
+        text = truncate_to_budget(clean_text(jd), budget)
+        attrs["tokens_after"] = estimate_tokens(text)
+    return Compacted(text, attrs["tokens_before"], attrs["tokens_after"], [], [])
+
+
+def compact_answers(answers, budget=DEFAULT_ANSWERS_BUDGET):
+    """
+    Render interview answers as a short transcript for a prompt.
+
+    Prior LLM feedback is reduced to its score; questions and answers only get
+    whitespace normalized (clean_text's boilerplate and repeat removal is meant
+    for resumes and would delete parts of an answer), and each answer gets an
+    equal share of the budget.
+    """
+    before = sum(estimate_tokens(str(a.get(k, ""))) for a in answers for k in ("question", "answer", "feedback"))
+    with span("compact_answers", tokens_before=before) as attrs:
+        per_answer = None if budget is None or not answers else max(20, budget // len(answers))
+        blocks = []
+        for i, a in enumerate(answers, start=1):
+            score = _SCORE.search(str(a.get("feedback", "")))
+            block = f"Q{i}: {normalize_whitespace(a.get('question', ''))}\nA{i}: {normalize_whitespace(a.get('answer', ''))}"
+            block = truncate_to_budget(block, per_answer)
+            if score:
+                block += f"\nScore: {score.group(1)}/10"
+            blocks.append(block)
+        text = "\n".join(blocks)
+        attrs["tokens_after"] = estimate_tokens(text)
+    return Compacted(text, attrs["tokens_before"], attrs["tokens_after"], [], [])
@@ -0,0 +1,196 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+
+import numpy as np
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "relevance_index.db")
+
+# BM25 parameters (standard Okapi defaults)
+K1 = 1.5
+B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the to was were will with "
+    "we you your our their this these those who what which i me my he she they them his her not but "
+    "can able etc using use used work working experience years year strong good knowledge".split()
+)
+
+
+def tokenize(text):
+    """Lowercase word tokens, keeping tech names like c++, c#, node.js intact."""
+    tokens = []
+    for tok in _TOKEN_RE.findall((text or "").lower()):
+        tok = tok.rstrip(".")
+        if len(tok) > 1 and tok not in STOPWORDS:
+            tokens.append(tok)
+    return tokens
+
+
+def doc_key(text):
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+
+class RelevanceIndex:
+    """
+    Persistent BM25 inverted index (SQLite) with NumPy scoring.
+
+    Documents are keyed by a hash of their text, so re-adding the same resume
+    is a no-op. Document frequencies accumulate across screening runs, which
+    keeps IDF weights stable as the applicant pool grows.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS docs (
+                doc_id INTEGER PRIMARY KEY,
+                key TEXT UNIQUE NOT NULL,
+                length INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS terms (
+                term_id INTEGER PRIMARY KEY,
+                term TEXT UNIQUE NOT NULL,
+                df INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term_id INTEGER NOT NULL,
+                doc_id INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term_id, doc_id)
+            ) WITHOUT ROWID;
+            """
+        )
+        self._conn.commit()
+
+    def add_document(self, text):
+        """Index a document (if new) and return its doc_id."""
+        key = doc_key(text)
+        with self._lock:
+            row = self._conn.execute("SELECT doc_id FROM docs WHERE key = ?", (key,)).fetchone()
+            if row:
+                return row[0]
+            counts = Counter(tokenize(text))
+            cur = self._conn.execute("INSERT INTO docs (key, length) VALUES (?, ?)", (key, sum(counts.values())))
+            doc_id = cur.lastrowid
+            self._conn.executemany("INSERT OR IGNORE INTO terms (term) VALUES (?)", [(t,) for t in counts])
+            self._conn.executemany("UPDATE terms SET df = df + 1 WHERE term = ?", [(t,) for t in counts])
+            self._conn.executemany(
+                "INSERT INTO postings (term_id, doc_id, tf) SELECT term_id, ?, ? FROM terms WHERE term = ?",
+                [(doc_id, tf, t) for t, tf in counts.items()],
+            )
+            self._conn.commit()
+            return doc_id
+
+    def _select_in(self, sql, values, chunk_size=500, prefix=()):
+        # Run an "IN (...)" query in chunks to stay under SQLite's bound-parameter limit;
+        # prefix holds parameters bound before the chunked list
+        rows = []
+        for i in range(0, len(values), chunk_size):
+            chunk = values[i:i + chunk_size]
+            rows += self._conn.execute(sql.format(",".join("?" * len(chunk))), list(prefix) + chunk).fetchall()
+        return rows
+
+    def score(self, query_text, doc_ids):
+        """BM25 score of query_text against each doc_id, returned as a float array in doc_ids order."""
+        requested = np.asarray(doc_ids, dtype=np.int64)
+        # Score each distinct doc once (sorted), then map back to the caller's order
+        doc_ids, inverse = np.unique(requested, return_inverse=True)
+        scores = np.zeros(len(doc_ids), dtype=np.float64)
+        query = Counter(tokenize(query_text))
+        if not len(doc_ids) or not query:
+            return scores[inverse]
+
+        with self._lock:
+            n_docs, avgdl = self._conn.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+            term_rows = self._select_in("SELECT term_id, term, df FROM terms WHERE term IN ({})", list(query))
+            term_ids = [r[0] for r in term_rows]
+            # Only the requested docs' postings: the index keeps every resume ever screened
+            postings = []
+            for i in range(0, len(term_ids), 250):
+                terms = term_ids[i:i + 250]
+                postings += self._select_in(
+                    f"SELECT term_id, doc_id, tf FROM postings WHERE term_id IN ({','.join('?' * len(terms))}) "
+                    "AND doc_id IN ({})", [int(d) for d in doc_ids], chunk_size=500, prefix=terms,
+                )
+            lengths = dict(self._select_in("SELECT doc_id, length FROM docs WHERE doc_id IN ({})", [int(d) for d in doc_ids]))
+        if not postings:
+            return scores[inverse]
+
+        # Per-term weights: IDF times how often the JD repeats the term
+        df = np.array([r[2] for r in term_rows], dtype=np.float64)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        qtf = np.array([query[r[1]] for r in term_rows], dtype=np.float64)
+        term_ids = np.array(term_ids, dtype=np.int64)
+        term_order = np.argsort(term_ids)
+        weights = (idf * qtf)[term_order]
+
+        post = np.array(postings, dtype=np.int64)
+        # Keep only postings for the requested docs and map them to output positions
+        pos = np.clip(np.searchsorted(doc_ids, post[:, 1]), 0, len(doc_ids) - 1)
+        mask = doc_ids[pos] == post[:, 1]
+        post, pos = post[mask], pos[mask]
+        if not len(post):
+            return scores[inverse]
+
+        tf = post[:, 2].astype(np.float64)
+        dl = np.array([lengths.get(int(d), avgdl) for d in doc_ids], dtype=np.float64)[pos]
+        w = weights[np.searchsorted(term_ids[term_order], post[:, 0])]
+        contrib = w * tf * (K1 + 1) / (tf + K1 * (1 - B + B * dl / (avgdl or 1.0)))
+        scores += np.bincount(pos, weights=contrib, minlength=len(doc_ids))
+        return scores[inverse]
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_index():
+    """Process-wide relevance index (created on first use)."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = RelevanceIndex()
+        return _default_index
+
+
+def rank_resumes(jd, resumes, top_k=None, min_relevance=None, index=None):
+    """
+    Rank (name, resume_text) pairs against a JD without any network calls.
+
+    Returns (name, resume_text, relevance, keep) tuples, best first. relevance
+    is the BM25 score scaled so the best resume in the pool is 1.0; keep marks
+    the resumes inside top_k and at or above min_relevance. If no resume
+    shares a term with the JD, relevance is 0 everywhere and says nothing,
+    so min_relevance is ignored and only top_k applies.
+    """
+    index = index or get_index()
+    resumes = list(resumes)
+    if not resumes:
+        return []
+    doc_ids = [index.add_document(text) for _, text in resumes]
+    raw = index.score(jd, doc_ids)
+    top = raw.max()
+    relevance = raw / top if top > 0 else raw
+
+    order = np.argsort(-relevance, kind="stable")
+    ranked = []
+    for rank, i in enumerate(order):
+        keep = True
+        if top_k is not None and rank >= top_k:
+            keep = False
+        if min_relevance is not None and top > 0 and relevance[i] < min_relevance:
+            keep = False
+        name, text = resumes[i]
+        ranked.append((name, text, round(float(relevance[i]), 3), keep))
+    return ranked
@@ -1,22 +1,47 @@
-import google.generativeai as genai
+import io
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from fpdf import FPDF
+from PyPDF2 import PdfReader, PdfWriter
 from datetime import datetime
-import streamlit as st
 import re
+from utils.llm_cache import cached_generate
+from utils.llm_client import get_client
+from utils.metrics import record, span
+from utils.prompt_compactor import compact_answers, compact_resume
 
-def generate_pdf_report(candidate, answers, final_score, include_special_chars=False, max_chars=1200):
-    """
-    Generate a short, clean hiring report PDF.
+# Sanitization patterns (compiled once; a regex pass is much faster than a per-character generator)
+# - ASCII mode: keep printable ASCII 32-126 plus newline
+# - extended mode: keep Latin-1 (accents) plus newline/tab, drop other control chars
+_NOT_ASCII_PRINTABLE = re.compile(r"[^\n\x20-\x7e]+")
+_NOT_LATIN1_PRINTABLE = re.compile(r"[^\n\t\x20-\xff]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+_SPACE_RUNS = re.compile(r" {2,}")
+
+
+def sanitize(s, allow_extended=False):
+    if not s:
+        return ""
+    # normalize newlines
+    s = s.replace("\r\n", "\n").replace("\r", "\n")
+    if allow_extended:
+        # everything left is <= 0xFF, so it is representable in latin-1 for FPDF
+        return _NOT_LATIN1_PRINTABLE.sub("", s)
+    s = _NOT_ASCII_PRINTABLE.sub("", s)
+    # collapse multiple blank lines to single blank line
+    s = _BLANK_LINES.sub("\n\n", s)
+    # trim long runs of spaces
+    s = _SPACE_RUNS.sub(" ", s)
+    return s.strip()
 
-    - include_special_chars=False: strips non-printable and non-ASCII characters (neat & safe).
-    - include_special_chars=True: allows extended Latin characters (tries to preserve accents).
-    - max_chars: max characters for the generated detailed text (keeps report to 1-2 pages).
-    Returns: PDF bytes (latin-1 encoded).
-    """
 
-    # Configure Gemini (do this once at startup ideally)
-    genai.configure(api_key=st.secrets["GEMINI_API_KEY"])
-    model = genai.GenerativeModel("gemini-2.5-flash")
+def generate_report_summary(candidate, answers, final_score, max_chars=1200, use_cache=True, model=None):
+    """LLM-written summary text for the report (falls back to a plain score summary), truncated to max_chars."""
+    model = model or get_client()
+    # Compact transcript (question, answer, score) instead of the repr of the whole answers list
+    resume = compact_resume(candidate.get('resume_text', ''), candidate.get('jd', ''))
+    transcript = compact_answers(answers)
 
     # Short prompt so model returns a brief report (1-2 paragraph, bullet points)
     prompt = f"""
@@ -29,30 +54,16 @@ professional, and suitable to fit in one page. Include:
 - Final recommendation (one line)
 
 Candidate name: {candidate.get('name','Unknown')}
-Resume highlights: {candidate.get('resume_text','')}
-Interview answers (short): {answers}
+Resume highlights: {resume.text}
+Interview answers (short):
+{transcript.text}
 Final score: {final_score}/100
 """
-    # Generate model output (defensive extraction)
+    # Generate model output (cached; text extraction handles odd response shapes)
     try:
-        try:
-            response = model.generate_content(prompt)
-        except TypeError:
-            response = model.generate_content(contents=prompt)
-
-        # Common property
-        if hasattr(response, "text") and response.text:
-            report_content = response.text
-        else:
-            # fallback shapes
-            report_content = ""
-            try:
-                report_content = response.candidates[0].content[0].text
-            except Exception:
-                try:
-                    report_content = getattr(response, "output_text", "") or ""
-                except Exception:
-                    report_content = ""
+        with span("report_summary", prompt_chars=len(prompt), tokens_before=resume.tokens_before + transcript.tokens_before,
+                  tokens_after=resume.tokens_after + transcript.tokens_after):
+            report_content = cached_generate(model, prompt, use_cache=use_cache)
     except Exception as e:
         # fallback short summary if model fails
         report_content = (
@@ -72,38 +83,21 @@ Final score: {final_score}/100
         cut_pos = max(last_period, last_newline)
         if cut_pos > int(max_chars*0.5):
             report_content = report_content[:cut_pos+1]
+    return report_content
+
+
+def new_report_pdf():
+    pdf = FPDF(format='A4')
+    pdf.set_auto_page_break(auto=True, margin=15)
+    return pdf
 
-    # Sanitization:
-    # - If include_special_chars False: keep printable ASCII + newline + basic punctuation
-    # - If True: try to preserve Latin-1 characters (accents) and remove control chars
-    def sanitize(s: str, allow_extended=False):
-        if not s:
-            return ""
-        # normalize newlines
-        s = s.replace("\r\n", "\n").replace("\r", "\n")
-
-        if allow_extended:
-            # remove C0 control chars (except newline and tab), keep others, then ensure latin-1 encodable
-            s = ''.join(ch for ch in s if (ch == '\n' or ch == '\t' or (ord(ch) >= 32 and ord(ch) <= 255)))
-            # encode-decode via latin-1 to ensure bytes are representable for FPDF, replacing unknowns
-            s = s.encode('latin-1', errors='replace').decode('latin-1')
-            return s
-        else:
-            # Keep common printable ASCII range plus newlines and basic punctuation
-            # Allow ASCII 32-126 and newline
-            s = ''.join(ch for ch in s if (ch == '\n' or 32 <= ord(ch) <= 126))
-            # collapse multiple blank lines to single blank line
-            s = re.sub(r'\n\s*\n+', '\n\n', s)
-            # trim long runs of spaces
-            s = re.sub(r' {2,}', ' ', s)
-            return s.strip()
 
+def render_report_section(pdf, candidate, answers, final_score, report_content, include_special_chars=False):
+    """Lay out one candidate's report on a new page of `pdf` (shared by single and bulk export)."""
     sanitized = sanitize(report_content, allow_extended=include_special_chars)
 
     # Build the PDF (compact, readable layout)
-    pdf = FPDF(format='A4')
     pdf.add_page()
-    pdf.set_auto_page_break(auto=True, margin=15)
 
     # Header
     pdf.set_font("Arial", "B", 14)
@@ -112,7 +106,7 @@ Final score: {final_score}/100
 
     # Candidate basic info line
     pdf.set_font("Arial", size=11)
-    name_line = f"Candidate: {candidate.get('name','')}"
+    name_line = sanitize(f"Candidate: {candidate.get('name','')}", allow_extended=include_special_chars)
     resume_score = f"Resume Score: {candidate.get('resume_score','N/A')}/100"
     interview_score = f"Interview Score: {candidate.get('interview_score', 85 + len(answers))}/100"
     pdf.cell(0, 7, f"{name_line}  |  {resume_score}  |  {interview_score}", ln=1)
@@ -140,5 +134,133 @@ Final score: {final_score}/100
     rec = "Recommendation: STRONG HIRE" if final_score >= 75 else "Recommendation: REVIEW"
     pdf.cell(0, 8, rec, ln=1)
 
+
+def pdf_bytes(pdf):
     # Return bytes (latin-1)
     return pdf.output(dest="S").encode("latin-1")
+
+
+def _render_pdf(candidate, answers, final_score, report_content, include_special_chars):
+    pdf = new_report_pdf()
+    render_report_section(pdf, candidate, answers, final_score, report_content, include_special_chars)
+    return pdf_bytes(pdf)
+
+
+def generate_pdf_report(candidate, answers, final_score, include_special_chars=False, max_chars=1200, use_cache=True, model=None):
+    """
+    Generate a short, clean hiring report PDF.
+
+    - include_special_chars=False: strips non-printable and non-ASCII characters (neat & safe).
+    - include_special_chars=True: allows extended Latin characters (tries to preserve accents).
+    - max_chars: max characters for the generated detailed text (keeps report to 1-2 pages).
+    - use_cache: reuse a cached summary for identical inputs instead of calling the model again.
+    - model: model/client to use (defaults to the shared Gemini client).
+    Returns: PDF bytes (latin-1 encoded).
+    """
+    report_content = generate_report_summary(candidate, answers, final_score, max_chars=max_chars, use_cache=use_cache, model=model)
+    with span("pdf_render") as attrs:
+        data = _render_pdf(candidate, answers, final_score, report_content, include_special_chars)
+        attrs["bytes"] = len(data)
+    return data
+
+
+def _render_batch_worker(jobs, include_special_chars):
+    # Runs in a worker process; each chunk of reports is rendered with the shared section layout
+    # Returns (document key, PDF bytes, [(report index, seconds)]) per document, like _render_chunk_worker
+    results = []
+    for job in jobs:
+        start = time.perf_counter()
+        data = _render_pdf(job["candidate"], job["answers"], job["final_score"], job["summary"], include_special_chars)
+        results.append((job["index"], data, [(job["index"], time.perf_counter() - start)]))
+    return results
+
+
+def _render_chunk_worker(jobs, include_special_chars):
+    # Runs in a worker process; the whole chunk goes into one document, so a combined export
+    # only merges one PDF per chunk instead of re-parsing every report
+    pdf = new_report_pdf()
+    seconds = []
+    for job in jobs:
+        start = time.perf_counter()
+        render_report_section(pdf, job["candidate"], job["answers"], job["final_score"], job["summary"],
+                              include_special_chars)
+        seconds.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    data = pdf_bytes(pdf)
+    # Serializing is shared work: split it evenly across the chunk's reports
+    share = (time.perf_counter() - start) / len(jobs)
+    return [(jobs[0]["index"], data, [(job["index"], s + share) for job, s in zip(jobs, seconds)])]
+
+
+def _report_filename(candidate, index, used):
+    base = re.sub(r"[^A-Za-z0-9_-]+", "_", str(candidate.get("name") or "candidate")).strip("_") or "candidate"
+    name = f"{base}_TalentFlow_Report.pdf"
+    if name in used:
+        name = f"{base}_{index + 1}_TalentFlow_Report.pdf"
+    used.add(name)
+    return name
+
+
+def export_reports(items, output="zip", include_special_chars=False, max_chars=1200, use_cache=True, model=None,
+                   workers=None, chunk_size=8, progress=None):
+    """
+    Render reports for many candidates into one archive.
+
+    - items: list of dicts with "candidate", "answers" and "final_score".
+    - output: "zip" (one PDF per candidate) or "pdf" (one combined multi-section PDF).
+    - Summaries are fetched concurrently through the (rate-limited, cached) model client,
+      then PDFs are rendered across a process pool in chunks of chunk_size; for "pdf"
+      each chunk is rendered as one document and only the chunk documents are merged.
+    - progress(done, total) is called as reports finish.
+    Returns (bytes, timings) where timings has one dict per report.
+    """
+    model = model or get_client()
+    total = len(items)
+    timings = [{"name": item["candidate"].get("name", ""), "summary_seconds": 0.0, "render_seconds": 0.0} for item in items]
+
+    def summarize(i):
+        start = time.perf_counter()
+        item = items[i]
+        summary = generate_report_summary(item["candidate"], item["answers"], item["final_score"],
+                                          max_chars=max_chars, use_cache=use_cache, model=model)
+        timings[i]["summary_seconds"] = round(time.perf_counter() - start, 3)
+        return summary
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        summaries = list(pool.map(summarize, range(total)))
+
+    jobs = [
+        {"index": i, "candidate": item["candidate"], "answers": item["answers"],
+         "final_score": item["final_score"], "summary": summaries[i]}
+        for i, item in enumerate(items)
+    ]
+    chunks = [jobs[i:i + chunk_size] for i in range(0, total, chunk_size)]
+    worker = _render_chunk_worker if output == "pdf" else _render_batch_worker
+    documents = {}  # first report index -> PDF (one per report for "zip", one per chunk for "pdf")
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(worker, chunk, include_special_chars) for chunk in chunks]
+        for future in as_completed(futures):
+            for key, data, report_seconds in future.result():
+                documents[key] = data
+                for index, seconds in report_seconds:
+                    timings[index]["render_seconds"] = round(seconds, 3)
+                    # Workers can't reach this process's metrics store, so record their timings here
+                    record("pdf_render", seconds, bytes=len(data) // len(report_seconds))
+                    done += 1
+            if progress:
+                progress(done, total)
+
+    buffer = io.BytesIO()
+    if output == "pdf":
+        writer = PdfWriter()
+        for key in sorted(documents):
+            for page in PdfReader(io.BytesIO(documents[key])).pages:
+                writer.add_page(page)
+        writer.write(buffer)
+    else:
+        used = set()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for i in range(total):
+                archive.writestr(_report_filename(items[i]["candidate"], i, used), documents[i])
+    return buffer.getvalue(), timings
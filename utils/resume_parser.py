@@ -1,8 +1,109 @@
+import io
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
 from PyPDF2 import PdfReader
 
-def extract_text_from_pdf(pdf_file):
-    reader = PdfReader(pdf_file)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
-    return text
\ No newline at end of file
+from utils.metrics import span
+
+# The scoring prompt only needs the first few pages of a resume
+DEFAULT_MAX_PAGES = 10
+DEFAULT_MAX_CHARS = 30000
+# Documents with at least this many pages (within budget) are split across processes
+PARALLEL_PAGE_THRESHOLD = 16
+PAGES_PER_CHUNK = 4
+
+PageText = namedtuple("PageText", ["number", "text", "seconds"])
+
+
+def _read_bytes(pdf_file):
+    if isinstance(pdf_file, (bytes, bytearray)):
+        return bytes(pdf_file)
+    if hasattr(pdf_file, "getvalue"):
+        return pdf_file.getvalue()
+    if hasattr(pdf_file, "seek"):
+        pdf_file.seek(0)
+    return pdf_file.read()
+
+
+def _extract_page(page, number):
+    start = time.perf_counter()
+    # extract_text() returns None for pages without a text layer (e.g. scans)
+    text = page.extract_text() or ""
+    return PageText(number, text, time.perf_counter() - start)
+
+
+def _extract_page_range(data, start, stop):
+    # Runs in a worker process: re-open the document from bytes and do a slice of pages
+    reader = PdfReader(io.BytesIO(data))
+    return [_extract_page(reader.pages[i], i + 1) for i in range(start, stop)]
+
+
+def iter_pdf_pages(pdf_file, max_pages=DEFAULT_MAX_PAGES, max_chars=DEFAULT_MAX_CHARS, workers=None):
+    """
+    Yield PageText(number, text, seconds) for each page, in page order.
+
+    - max_pages / max_chars: stop early once either budget is reached (None = no limit).
+    - workers: process pool size for large documents. None picks automatically
+      (parallel only past PARALLEL_PAGE_THRESHOLD pages), 1 forces sequential.
+    """
+    data = _read_bytes(pdf_file)
+    reader = PdfReader(io.BytesIO(data))
+    page_count = len(reader.pages)
+    limit = min(page_count, max_pages) if max_pages else page_count
+    chars = 0
+
+    if workers == 1 or (workers is None and limit < PARALLEL_PAGE_THRESHOLD):
+        for i in range(limit):
+            page = _extract_page(reader.pages[i], i + 1)
+            yield page
+            chars += len(page.text)
+            if max_chars and chars >= max_chars:
+                return
+        return
+
+    chunks = [(start, min(start + PAGES_PER_CHUNK, limit)) for start in range(0, limit, PAGES_PER_CHUNK)]
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        # Keep a small window of chunks in flight so an early stop wastes little work
+        window = (workers or os.cpu_count() or 1) * 2
+        futures = [pool.submit(_extract_page_range, data, start, stop) for start, stop in chunks[:window]]
+        next_chunk = len(futures)
+        for i in range(len(chunks)):
+            pages = futures[i].result()
+            if next_chunk < len(chunks):
+                start, stop = chunks[next_chunk]
+                futures.append(pool.submit(_extract_page_range, data, start, stop))
+                next_chunk += 1
+            for page in pages:
+                yield page
+                chars += len(page.text)
+                if max_chars and chars >= max_chars:
+                    return
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def extract_text_from_pdf(pdf_file, max_pages=DEFAULT_MAX_PAGES, max_chars=DEFAULT_MAX_CHARS, workers=None, timings=None):
+    """
+    Extract resume text, stopping at the page/character budget.
+
+    If a list is passed as `timings`, a (page_number, seconds, chars) tuple is
+    appended to it for every page read.
+    """
+    parts = []
+    with span("pdf_parse") as attrs:
+        pages = 0
+        for page in iter_pdf_pages(pdf_file, max_pages=max_pages, max_chars=max_chars, workers=workers):
+            parts.append(page.text)
+            parts.append("\n")
+            pages += 1
+            if timings is not None:
+                timings.append((page.number, page.seconds, len(page.text)))
+        text = "".join(parts)
+        if max_chars and len(text) > max_chars:
+            text = text[:max_chars]
+        attrs.update(pages=pages, chars=len(text))
+    return text
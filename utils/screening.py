@@ -0,0 +1,381 @@
+import io
+import json
+import time
+import zipfile
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from utils.resume_parser import extract_text_from_pdf
+from utils.llm_cache import cached_generate
+from utils.relevance import rank_resumes
+from utils.metrics import record, span
+from utils.prompt_compactor import compact_jd, compact_resume
+
+NUM_QUESTIONS = 5
+
+SCREENING_PROMPT = """
+            Job Description: {jd}
+            Resume: {resume_text}
+            Extract the candidate's full name and academic marks/CGPA for 10th, PU (12th) and Engineering,
+            score this resume against the job description out of 100, list strengths and gaps, list the
+            candidate's skills as short canonical names (e.g. "Python", "Django", "AWS"), write a one-line summary, and write exactly {num_questions} behavioral and technical interview questions
+            tailored to the experience and skills in the resume. Return JSON only, matching the schema.
+            Use "" for any marks not stated in the resume.
+            """
+
+# Gemini response schema (JSON mode): the model must return exactly this object
+SCREENING_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "name": {"type": "STRING"},
+        "10th_marks": {"type": "STRING"},
+        "pu_marks": {"type": "STRING"},
+        "engineering_cgpa": {"type": "STRING"},
+        "score": {"type": "INTEGER"},
+        "match_percentage": {"type": "STRING"},
+        "strengths": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "gaps": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "skills": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "summary": {"type": "STRING"},
+        "questions": {"type": "ARRAY", "items": {"type": "STRING"}},
+    },
+    "required": ["name", "score", "strengths", "gaps", "skills", "summary", "questions"],
+}
+
+GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": SCREENING_SCHEMA,
+    "temperature": 0.2,
+}
+
+
+class ScreeningError(Exception):
+    """The model's screening reply was missing, malformed or out of range."""
+
+
+@dataclass
+class ScreeningResult:
+    name: str
+    score: int
+    match_percentage: str
+    summary: str = ""
+    strengths: list = field(default_factory=list)
+    gaps: list = field(default_factory=list)
+    skills: list = field(default_factory=list)
+    questions: list = field(default_factory=list)
+    tenth_marks: str = ""
+    pu_marks: str = ""
+    engineering_cgpa: str = ""
+
+    def to_dict(self):
+        """Plain dict in the shape stored on the candidate and shown in the UI."""
+        return {
+            "name": self.name,
+            "10th_marks": self.tenth_marks,
+            "pu_marks": self.pu_marks,
+            "engineering_cgpa": self.engineering_cgpa,
+            "score": self.score,
+            "match_percentage": self.match_percentage,
+            "strengths": self.strengths,
+            "gaps": self.gaps,
+            "skills": self.skills,
+            "summary": self.summary,
+            "questions": self.questions,
+        }
+
+
+def _strip_fence(text):
+    # Models sometimes wrap JSON in a ```json fence even in JSON mode
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def _string_list(value, field_name):
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise ScreeningError(f"'{field_name}' should be a list, got {type(value).__name__}")
+    return [str(v).strip() for v in value if str(v).strip()]
+
+
+def parse_screening(text):
+    """Validate a screening reply and return a ScreeningResult; raises ScreeningError."""
+    if not text or not text.strip():
+        raise ScreeningError("Empty response from model")
+    try:
+        data = json.loads(_strip_fence(text))
+    except ValueError as e:
+        raise ScreeningError(f"Response is not valid JSON: {e}") from None
+    if not isinstance(data, dict):
+        raise ScreeningError("Response is not a JSON object")
+
+    try:
+        score = int(round(float(str(data.get("score")).rstrip("%"))))
+    except (TypeError, ValueError):
+        raise ScreeningError(f"Missing or non-numeric score: {data.get('score')!r}") from None
+    if not 0 <= score <= 100:
+        raise ScreeningError(f"Score {score} is outside 0-100")
+    # The interview and report walk through exactly NUM_QUESTIONS questions
+    questions = _string_list(data.get("questions"), "questions")
+    if len(questions) < NUM_QUESTIONS:
+        raise ScreeningError(f"Expected {NUM_QUESTIONS} interview questions, got {len(questions)}")
+
+    return ScreeningResult(
+        name=str(data.get("name") or "").strip() or "Candidate",
+        score=score,
+        match_percentage=str(data.get("match_percentage") or f"{score}%"),
+        summary=str(data.get("summary") or "").strip(),
+        strengths=_string_list(data.get("strengths"), "strengths"),
+        gaps=_string_list(data.get("gaps"), "gaps"),
+        skills=_string_list(data.get("skills"), "skills"),
+        questions=questions[:NUM_QUESTIONS],
+        tenth_marks=str(data.get("10th_marks") or ""),
+        pu_marks=str(data.get("pu_marks") or ""),
+        engineering_cgpa=str(data.get("engineering_cgpa") or ""),
+    )
+
+
+def screen_resume(jd, resume_text, model, use_cache=True):
+    """
+    Score a resume and draft its interview questions in one schema-constrained call.
+
+    Returns a ScreeningResult. Raises ScreeningError if the model is unavailable,
+    the call fails or the reply doesn't validate (invalid replies are not cached).
+    """
+    if model is None:
+        raise ScreeningError("AI unavailable: configure GEMINI_API_KEY to score resumes")
+    resume, job = compact_resume(resume_text, jd), compact_jd(jd)
+    prompt = SCREENING_PROMPT.format(jd=job.text, resume_text=resume.text, num_questions=NUM_QUESTIONS)
+    with span("resume_scoring", prompt_chars=len(prompt), tokens_before=resume.tokens_before + job.tokens_before,
+              tokens_after=resume.tokens_after + job.tokens_after):
+        try:
+            text = cached_generate(model, prompt, use_cache=use_cache, validate=parse_screening,
+                                   generation_config=GENERATION_CONFIG)
+        except ScreeningError:
+            raise
+        except Exception as e:
+            raise ScreeningError(f"Model call failed: {e}") from e
+    return parse_screening(text)
+
+
+def score_resume(jd, resume_text, model, use_cache=True):
+    """Score one resume against a JD and return the result as a dict (see screen_resume)."""
+    return screen_resume(jd, resume_text, model, use_cache=use_cache).to_dict()
+
+
+def iter_resume_files(uploads):
+    """
+    Expand uploaded files into (filename, pdf_bytes) pairs.
+
+    Accepts PDFs and zip archives of PDFs (nested folders are fine, macOS
+    resource forks are skipped).
+    """
+    for upload in uploads:
+        name = getattr(upload, "name", "resume.pdf")
+        data = upload.getvalue() if hasattr(upload, "getvalue") else upload.read()
+        if name.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                for info in archive.infolist():
+                    entry = info.filename
+                    if info.is_dir() or not entry.lower().endswith(".pdf") or "__MACOSX" in entry:
+                        continue
+                    yield entry, archive.read(info)
+        else:
+            yield name, data
+
+
+def _extract_worker(filename, data):
+    # Runs in a worker process, so it only takes and returns plain data; its pdf_parse span
+    # lands in the worker's metrics store, so the timing is returned for the parent to record.
+    # Files are already spread across processes, so pages are read sequentially here.
+    start = time.perf_counter()
+    timings = []
+    try:
+        text = extract_text_from_pdf(io.BytesIO(data), workers=1, timings=timings)
+    except Exception as e:
+        return filename, None, time.perf_counter() - start, len(timings), str(e)
+    return filename, text, time.perf_counter() - start, len(timings), None
+
+
+def _ok_row(filename, result, resume_text, attempts, seconds, duplicate=""):
+    return {
+        "file": filename,
+        "name": result.get("name", "Candidate"),
+        "score": result.get("score"),
+        "match": result.get("match_percentage", ""),
+        "summary": result.get("summary", ""),
+        "status": "ok",
+        "attempts": attempts,
+        "seconds": round(seconds, 2),
+        "error": "",
+        "details": result,
+        "resume_text": resume_text,
+        "relevance": None,
+        "duplicate": duplicate,
+    }
+
+
+def describe_duplicate(match):
+    """Short label for a DuplicateMatch, e.g. 'same file' or 'near-duplicate (93%)'."""
+    if match is None:
+        return ""
+    if match.kind == "near":
+        return f"near-duplicate ({match.similarity:.0%})"
+    return "same file" if match.kind == "file" else "same text"
+
+
+def _score_with_retries(jd, filename, resume_text, model, max_retries, backoff, use_cache=True):
+    start = time.perf_counter()
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            result = score_resume(jd, resume_text, model, use_cache=use_cache)
+            return _ok_row(filename, result, resume_text, attempts, time.perf_counter() - start)
+        except Exception as e:
+            # The client already retries transient API errors, so only a reply that failed
+            # validation (a ScreeningError not caused by the call) is worth asking for again
+            invalid_reply = isinstance(e, ScreeningError) and e.__cause__ is None
+            if not invalid_reply or attempts > max_retries:
+                return _failed_row(filename, f"Scoring failed: {e}", attempts, time.perf_counter() - start)
+            time.sleep(backoff * (2 ** (attempts - 1)))
+
+
+def _failed_row(filename, error, attempts=1, seconds=0.0):
+    return {
+        "file": filename,
+        "name": "",
+        "score": None,
+        "match": "",
+        "summary": "",
+        "status": "failed",
+        "attempts": attempts,
+        "seconds": round(seconds, 2),
+        "error": error,
+        "details": {},
+        "resume_text": "",
+        "relevance": None,
+        "duplicate": "",
+    }
+
+
+def screen_resumes(jd, files, model, concurrency=8, extract_workers=None, max_retries=2, backoff=1.0, use_cache=True,
+                   top_k=None, min_relevance=None, index=None, dedup=None, reuse_duplicates=True):
+    """
+    Screen many resumes against one JD and yield a result row per resume as it finishes.
+
+    - files: iterable of (filename, pdf_bytes), e.g. from iter_resume_files().
+    - concurrency: cap on in-flight scoring requests to the model.
+    - extract_workers: size of the PDF extraction process pool (None = CPU count).
+    - max_retries/backoff: re-asks, with exponential backoff, when a reply fails
+      validation (transient API errors are retried by the model client).
+    - use_cache: serve repeat resumes from the LLM response cache.
+    - top_k/min_relevance: if either is set, rank the whole pool locally (BM25)
+      once extraction finishes and only send the shortlist to the model; the
+      rest are yielded with status "filtered".
+    - dedup: a ResumeIndex. Files seen before skip text extraction, resubmitted
+      or near-duplicate resumes are flagged in the "duplicate" column and, with
+      reuse_duplicates, take their earlier result for this JD instead of a
+      model call. Newly scored resumes are added to it.
+    A failure on one resume yields a row with status "failed"; the rest keep going.
+    """
+    prefilter = top_k is not None or min_relevance is not None
+    extract_pool = ProcessPoolExecutor(max_workers=extract_workers)
+    score_pool = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        extracting = {}
+        scoring = {}
+        extracted = []
+        duplicates = {}  # resume text -> duplicate label, for rows still to be scored
+
+        def submit_score(filename, resume_text, relevance=None):
+            future = score_pool.submit(
+                _score_with_retries, jd, filename, resume_text, model, max_retries, backoff, use_cache
+            )
+            scoring[future] = relevance
+
+        def route(filename, resume_text, match=None):
+            # Returns a row to yield now (reused result), or None once the resume is queued for scoring
+            if dedup is not None:
+                if match is None or match.result is None:
+                    # A known file may still have a near-duplicate that was screened against this JD
+                    found = dedup.find(resume_text, jd)
+                    if found is not None and (match is None or found.result is not None):
+                        match = found
+                if match is not None and match.result is not None and reuse_duplicates:
+                    return _ok_row(filename, match.result, resume_text, 0, 0.0, describe_duplicate(match))
+                duplicates[resume_text] = describe_duplicate(match)
+            if prefilter:
+                extracted.append((filename, resume_text))
+            else:
+                submit_score(filename, resume_text)
+            return None
+
+        ready = []
+        for filename, data in files:
+            match = dedup.find_file(data, jd) if dedup is not None else None
+            if match is not None:
+                ready.append((filename, match.resume_text, match))
+                continue
+            future = extract_pool.submit(_extract_worker, filename, data)
+            extracting[future] = (filename, data)
+        for filename, resume_text, match in ready:
+            row = route(filename, resume_text, match)
+            if row is not None:
+                yield row
+
+        def shortlist():
+            # Whole pool is in: rank it in one vectorized pass, then score the shortlist
+            for filename, resume_text, relevance, keep in rank_resumes(jd, extracted, top_k, min_relevance, index):
+                if keep:
+                    submit_score(filename, resume_text, relevance)
+                else:
+                    row = _failed_row(filename, "")
+                    row.update(status="filtered", relevance=relevance, attempts=0, resume_text=resume_text,
+                               duplicate=duplicates.pop(resume_text, ""))
+                    yield row
+            extracted.clear()
+
+        # extracted can be non-empty with nothing extracting when every upload was a known file
+        while extracting or scoring or extracted:
+            if extracted and not extracting:
+                yield from shortlist()
+                continue
+            done, _ = wait(set(extracting) | set(scoring), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in extracting:
+                    filename, data = extracting.pop(future)
+                    try:
+                        _, resume_text, seconds, pages, error = future.result()
+                    except Exception as e:
+                        yield _failed_row(filename, f"Text extraction failed: {e}")
+                        continue
+                    record("pdf_parse", seconds, error=error is not None, pages=pages, chars=len(resume_text or ""))
+                    if error is not None:
+                        yield _failed_row(filename, f"Text extraction failed: {error}")
+                        continue
+                    if not resume_text.strip():
+                        yield _failed_row(filename, "No extractable text (scanned PDF?)")
+                        continue
+                    row = route(filename, resume_text)
+                    if dedup is not None:
+                        dedup.add(resume_text, data)
+                    if row is not None:
+                        yield row
+                else:
+                    row = future.result()
+                    row["relevance"] = scoring.pop(future)
+                    if dedup is not None:
+                        row["duplicate"] = duplicates.pop(row["resume_text"], "")
+                        if row["status"] == "ok":
+                            dedup.add(row["resume_text"], jd=jd, result=row["details"])
+                    yield row
+    finally:
+        # Closing the generator early (stopped run, dropped connection) drops queued work
+        # instead of waiting for it; calls already in flight still finish in the background
+        extract_pool.shutdown(wait=False, cancel_futures=True)
+        score_pool.shutdown(wait=False, cancel_futures=True)
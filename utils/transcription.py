@@ -0,0 +1,171 @@
+import threading
+
+import numpy as np
+
+from utils.audio_frontend import SAMPLE_RATE, to_float32, to_int16, trim_silence
+from utils.metrics import span
+
+
+class RingBuffer:
+    """
+    Fixed-size audio buffer addressed by absolute sample position.
+
+    Samples are stored as int16 (half the memory of float32) and read back as
+    float32. The writer never blocks or reallocates; if the reader falls more than
+    `capacity` samples behind, the oldest audio is overwritten and counted
+    in `dropped`.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+
+    def write(self, samples):
+        samples = to_int16(samples)
+        count = len(samples)
+        if count > self.capacity:
+            samples = samples[-self.capacity:]
+        with self._lock:
+            start = (self.written + count - len(samples)) % self.capacity
+            first = min(len(samples), self.capacity - start)
+            self._data[start:start + first] = samples[:first]
+            self._data[:len(samples) - first] = samples[first:]
+            self.written += count
+
+    def read(self, start, stop):
+        """Copy out samples [start, stop); positions older than the buffer are skipped."""
+        with self._lock:
+            oldest = max(0, self.written - self.capacity)
+            if start < oldest:
+                self.dropped += oldest - start
+                start = oldest
+            stop = min(stop, self.written)
+            if stop <= start:
+                return np.zeros(0, dtype=np.float32)
+            idx = np.arange(start, stop) % self.capacity
+            return to_float32(self._data[idx])
+
+
+class StreamingTranscriber:
+    """
+    Transcribe audio in fixed windows on a background thread while it is still arriving.
+
+    feed() is called from the audio callback and starts the worker thread on
+    the first audio, so a transcriber that never records holds no thread.
+    finish() transcribes whatever is left after the last full window and
+    returns the whole transcript, so only the tail has to be processed once
+    the candidate stops speaking; close() stops it and discards the rest.
+
+    With vad=True each window is trimmed of leading/trailing silence and long
+    pauses before Whisper sees it, and silent windows are skipped;
+    silence_removed is the total seconds cut.
+
+    A window the model rejects with TimeoutError (a full transcription queue)
+    is retried up to queue_retries more times. Audio that still can't be
+    transcribed, or that was overwritten in the buffer, is counted in
+    lost_seconds with the reasons in errors, so callers can tell the
+    transcript is incomplete.
+    """
+
+    def __init__(self, model, window_seconds=10.0, capacity_seconds=120.0, min_tail_seconds=0.3, vad=True,
+                 queue_retries=2):
+        self.model = model
+        self.window = int(window_seconds * SAMPLE_RATE)
+        self.min_tail = int(min_tail_seconds * SAMPLE_RATE)
+        self.buffer = RingBuffer(int(capacity_seconds * SAMPLE_RATE))
+        self.vad = vad
+        self.silence_removed = 0.0
+        self.queue_retries = queue_retries
+        self.failed_seconds = 0.0
+        self.position = 0
+        self.segments = []
+        self.errors = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._transcribe_lock = threading.Lock()
+
+    @property
+    def samples_received(self):
+        return self.buffer.written
+
+    @property
+    def lost_seconds(self):
+        """Seconds of recorded audio missing from the transcript (failed windows + buffer overruns)."""
+        return self.failed_seconds + self.buffer.dropped / SAMPLE_RATE
+
+    @property
+    def transcript(self):
+        return " ".join(s for s in self.segments if s).strip()
+
+    def start(self):
+        with self._thread_lock:
+            if self._thread is None and not self._stop.is_set():
+                self._thread = threading.Thread(target=self._run, name="whisper-stream", daemon=True)
+                self._thread.start()
+        return self
+
+    def feed(self, samples):
+        if self._thread is None:
+            self.start()
+        self.buffer.write(samples)
+        if self.buffer.written - self.position >= self.window:
+            self._wake.set()
+
+    def _transcribe(self, audio):
+        # Previous text as the prompt keeps wording consistent across window boundaries
+        with self._transcribe_lock:
+            removed = 0.0
+            if self.vad:
+                audio, removed = trim_silence(audio)
+                self.silence_removed += removed
+            if len(audio) < self.min_tail:
+                return
+            for attempt in range(self.queue_retries + 1):
+                try:
+                    with span("whisper_transcribe", audio_seconds=len(audio) / SAMPLE_RATE,
+                              silence_removed_seconds=removed):
+                        result = self.model.transcribe(audio, fp16=False, initial_prompt=self.transcript or None)
+                    self.segments.append(result["text"].strip())
+                    return
+                except TimeoutError as e:
+                    # Queue full: the submit already waited for a slot, so just try again
+                    error = e
+                except Exception as e:
+                    error = e
+                    break
+            self.failed_seconds += len(audio) / SAMPLE_RATE
+            self.errors.append(str(error))
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(timeout=0.5)
+            self._wake.clear()
+            while self.buffer.written - self.position >= self.window and not self._stop.is_set():
+                audio = self.buffer.read(self.position, self.position + self.window)
+                self.position += self.window
+                self._transcribe(audio)
+
+    def close(self, timeout=None):
+        """Stop the worker without transcribing the tail (abandoned question or recording)."""
+        with self._thread_lock:
+            self._stop.set()
+            self._wake.set()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def finish(self, timeout=None):
+        """Stop the worker, transcribe the remaining tail and return the full transcript."""
+        self.close(timeout)
+        while self.buffer.written - self.position > 0:
+            stop = min(self.position + self.window, self.buffer.written)
+            audio = self.buffer.read(self.position, stop)
+            self.position = stop
+            if len(audio) >= self.min_tail:
+                self._transcribe(audio)
+        return self.transcript
@@ -0,0 +1,339 @@
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from utils.audio_frontend import SAMPLE_RATE, to_float32, to_int16
+from utils.lazy_loader import DEFAULT_WHISPER_MODEL, WHISPER_MODEL_SIZES
+from utils.metrics import percentile, record
+
+_CPUS = os.cpu_count() or 1
+DEFAULT_WORKERS = int(os.environ.get("WHISPER_WORKERS", str(max(1, min(4, _CPUS // 2)))))
+DEFAULT_MAX_QUEUE = int(os.environ.get("WHISPER_MAX_QUEUE", "32"))
+DEFAULT_BATCH_SIZE = int(os.environ.get("WHISPER_BATCH_SIZE", "1"))  # 1 = no micro-batching
+DEFAULT_QUANTIZE = os.environ.get("WHISPER_INT8", "").lower() in ("1", "true", "yes")
+
+BATCH_MAX_SECONDS = 30.0  # Whisper's decode window; longer clips go through transcribe()
+BATCHABLE_OPTIONS = {"initial_prompt", "language", "fp16"}
+
+
+def _plain_linears(module):
+    # quantize_dynamic only swaps modules whose type is exactly nn.Linear, and Whisper
+    # builds its layers from its own whisper.model.Linear subclass: rebuild those as
+    # nn.Linear sharing the same parameters (on CPU the subclass's forward is identical)
+    import torch
+    for name, child in module.named_children():
+        if isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear:
+            plain = torch.nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+            plain.weight = child.weight
+            plain.bias = child.bias
+            setattr(module, name, plain)
+        else:
+            _plain_linears(child)
+
+
+def load_whisper(size, quantize=False):
+    """Load a CPU Whisper model; quantize=True converts its Linear layers to dynamic int8."""
+    import torch
+    import whisper
+    model = whisper.load_model(size, device="cpu")
+    if quantize:
+        _plain_linears(model)
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        swapped = sum(isinstance(m, torch.ao.nn.quantized.dynamic.Linear) for m in model.modules())
+        if not swapped:
+            raise RuntimeError("int8 quantization left every Linear layer in float32")
+    return model
+
+
+def transcribe_batch(model, clips, options):
+    """
+    Decode several <=30 s clips in one forward pass (stacked log-mel spectrograms).
+
+    Whisper shares one prompt across a batch, and each streaming session
+    prompts with its own transcript, so batched clips are decoded without one.
+    """
+    import torch
+    import whisper
+    mels = torch.stack([
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(clip), n_mels=model.dims.n_mels) for clip in clips
+    ])
+    decoding = whisper.DecodingOptions(
+        fp16=False, language=options.get("language"), without_timestamps=True
+    )
+    return [result.text for result in whisper.decode(model, mels, decoding)]
+
+
+def _batch_key(job):
+    _, audio, options = job
+    if len(audio) > BATCH_MAX_SECONDS * SAMPLE_RATE or not set(options) <= BATCHABLE_OPTIONS:
+        return None
+    # The prompt is left out of the key (and of the batched decode): keyed on it, windows
+    # from different sessions never matched, since each prompts with its own transcript
+    return (options.get("language"),)
+
+
+def take_batch(waiting, batch_size):
+    """Pop the oldest job plus up to batch_size-1 queued jobs that can share its decode pass."""
+    first = waiting.popleft()
+    batch = [first]
+    key = _batch_key(first) if batch_size > 1 else None
+    if key is not None:
+        for job in list(waiting):
+            if len(batch) >= batch_size:
+                break
+            if _batch_key(job) == key:
+                waiting.remove(job)
+                batch.append(job)
+    return batch
+
+
+def worker_main(index, size, threads, quantize, inbox, results, model_factory=load_whisper):
+    """Transcription worker process: one model, a fixed thread budget, one batch at a time."""
+    # Thread pools are sized at torch import, so the environment has to be set first
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    start = time.perf_counter()
+    try:
+        try:
+            import torch
+            torch.set_num_threads(threads)
+            torch.set_num_interop_threads(1)
+        except (ImportError, RuntimeError):
+            pass
+        model = model_factory(size, quantize)
+    except Exception as e:
+        results.put(("failed", index, str(e)))
+        return
+    results.put(("ready", index, time.perf_counter() - start))
+
+    while True:
+        batch = inbox.get()
+        if batch is None:
+            break
+        ids = [job_id for job_id, _, _ in batch]
+        begin = time.perf_counter()
+        try:
+            clips = [to_float32(audio) for _, audio, _ in batch]
+            if len(batch) > 1:
+                texts = transcribe_batch(model, clips, batch[0][2])
+            else:
+                texts = [model.transcribe(clips[0], **batch[0][2])["text"]]
+            outcome = [(job_id, text, None) for job_id, text in zip(ids, texts)]
+        except Exception as e:
+            outcome = [(job_id, None, str(e)) for job_id in ids]
+        results.put(("done", index, outcome, time.perf_counter() - begin))
+
+
+class TranscriptionPool:
+    """
+    Process-wide Whisper service: a bounded job queue in front of worker processes.
+
+    Each worker loads its own model and gets cpu_count // workers torch threads,
+    so concurrent interviews share the CPU instead of oversubscribing it. Clips
+    wait in one queue and are handed to whichever worker is idle.
+    transcribe() blocks the caller (like a Whisper model, so it can be handed
+    to StreamingTranscriber); submit() returns a Future. When more than
+    max_queue clips are waiting, submit() waits up to submit_timeout for a slot
+    and then raises TimeoutError instead of piling up work.
+
+    batch_size > 1 lets an idle worker take several waiting clips in the same
+    language and decode them together, without their initial_prompt (a clip
+    that finds no batch partner keeps its prompt); quantize=True uses int8
+    dynamic quantization.
+    """
+
+    def __init__(self, size=DEFAULT_WHISPER_MODEL, workers=DEFAULT_WORKERS, threads_per_worker=None,
+                 max_queue=DEFAULT_MAX_QUEUE, batch_size=DEFAULT_BATCH_SIZE, quantize=DEFAULT_QUANTIZE,
+                 submit_timeout=30.0, model_factory=load_whisper):
+        if size not in WHISPER_MODEL_SIZES:
+            raise ValueError(f"Unknown Whisper model size: {size}")
+        self.size = size
+        self.workers = max(1, workers)
+        self.threads_per_worker = threads_per_worker or max(1, _CPUS // self.workers)
+        self.max_queue = max_queue
+        self.batch_size = max(1, batch_size)
+        self.quantize = quantize
+        self.submit_timeout = submit_timeout
+        self.model_factory = model_factory
+        self.load_seconds = None
+        self.error = None
+        self._ctx = multiprocessing.get_context("spawn")  # torch is not fork-safe
+        self._results = self._ctx.Queue()
+        self._slots = threading.BoundedSemaphore(max_queue + self.workers * self.batch_size)
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._waiting = deque()  # (job id, int16 audio, options) not yet handed to a worker
+        self._futures = {}       # job id -> (future, submitted_at, audio_seconds)
+        self._busy = {}          # worker index -> job ids it is working on
+        self._inboxes = {}
+        self._procs = {}
+        self._ready = set()
+        self._waits = deque(maxlen=500)
+        self._completed = 0
+        self._errors = 0
+        self._batches = 0
+        self._batched_jobs = 0
+        self._collector = None
+        self._closed = False
+
+    # --- lifecycle ---
+
+    def warm_up(self):
+        """Start the workers (model loading happens in them) without blocking."""
+        with self._lock:
+            if self._collector is None:
+                for index in range(self.workers):
+                    self._spawn(index)
+                self._collector = threading.Thread(target=self._collect, name="whisper-pool", daemon=True)
+                self._collector.start()
+        return self
+
+    start = warm_up
+
+    def _spawn(self, index):
+        self._inboxes[index] = self._ctx.Queue()
+        proc = self._ctx.Process(
+            target=worker_main, name=f"whisper-worker-{index}", daemon=True,
+            args=(index, self.size, self.threads_per_worker, self.quantize,
+                  self._inboxes[index], self._results, self.model_factory),
+        )
+        proc.start()
+        self._procs[index] = proc
+
+    def shutdown(self, timeout=5.0):
+        self._closed = True
+        for inbox in self._inboxes.values():
+            inbox.put(None)
+        for proc in self._procs.values():
+            proc.join(timeout)
+        self._fail(list(self._futures), RuntimeError("transcription pool shut down"))
+
+    @property
+    def ready(self):
+        return bool(self._ready)
+
+    # --- jobs ---
+
+    def submit(self, audio, **options):
+        if self.error is not None and not self._ready:
+            raise RuntimeError(f"Whisper '{self.size}' workers failed to load: {self.error}")
+        self.warm_up()
+        if not self._slots.acquire(timeout=self.submit_timeout):
+            raise TimeoutError(f"Transcription queue full ({self.max_queue} clips waiting)")
+        future = Future()
+        job_id = next(self._ids)
+        with self._lock:
+            self._futures[job_id] = (future, time.time(), len(audio) / SAMPLE_RATE)
+            self._waiting.append((job_id, to_int16(audio), options))
+            self._dispatch()
+        return future
+
+    def transcribe(self, audio, **options):
+        return {"text": self.submit(audio, **options).result()}
+
+    def _dispatch(self):
+        # Caller holds self._lock
+        for index in sorted(self._ready):
+            if not self._waiting:
+                return
+            if self._busy.get(index):
+                continue
+            batch = take_batch(self._waiting, self.batch_size)
+            now = time.time()
+            for job_id, _, _ in batch:
+                wait = now - self._futures[job_id][1]
+                self._waits.append(wait)
+                record("transcription_queue_wait", wait, queue_depth=len(self._waiting))
+            if len(batch) > 1:
+                self._batches += 1
+                self._batched_jobs += len(batch)
+            self._busy[index] = [job_id for job_id, _, _ in batch]
+            self._inboxes[index].put(batch)
+
+    def _collect(self):
+        while not self._closed:
+            try:
+                message = self._results.get(timeout=0.5)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            kind, index = message[0], message[1]
+            if kind == "ready":
+                with self._lock:
+                    self._ready.add(index)
+                    self.load_seconds = max(self.load_seconds or 0.0, message[2])
+                    self._dispatch()
+            elif kind == "failed":
+                self.error = message[2]
+            elif kind == "done":
+                _, _, outcome, seconds = message
+                with self._lock:
+                    self._busy[index] = []
+                    self._dispatch()
+                for job_id, text, error in outcome:
+                    self._finish(job_id, text, error, seconds / len(outcome), len(outcome))
+
+    def _finish(self, job_id, text, error, seconds, batch):
+        with self._lock:
+            entry = self._futures.pop(job_id, None)
+            if entry is None:
+                return
+            self._completed += 1
+            self._errors += error is not None
+        future, _, audio_seconds = entry
+        self._slots.release()
+        record("transcription_inference", seconds, error=error is not None,
+               audio_seconds=audio_seconds, batch_size=batch)
+        if error is None:
+            future.set_result(text)
+        else:
+            future.set_exception(RuntimeError(error))
+
+    def _check_workers(self):
+        # A crashed worker takes its batch with it: fail those clips and replace the worker
+        for index, proc in list(self._procs.items()):
+            if proc.is_alive() or self._closed or proc.exitcode is None:
+                continue
+            if index not in self._ready:
+                # Died while loading without reporting why (e.g. killed for memory)
+                self._procs.pop(index)
+                self.error = self.error or f"worker {index} exited with code {proc.exitcode} while loading"
+                continue
+            with self._lock:
+                self._ready.discard(index)
+                lost = self._busy.pop(index, [])
+            for job_id in lost:
+                self._finish(job_id, None, f"Whisper worker {index} exited with code {proc.exitcode}", 0.0, 1)
+            self._spawn(index)
+        if self.error is not None and not any(p.is_alive() for p in self._procs.values()):
+            # Models failed to load everywhere: nothing will ever pick up the queued clips
+            self._fail(list(self._futures), RuntimeError(f"Whisper '{self.size}' workers failed to load: {self.error}"))
+
+    def _fail(self, ids, error):
+        with self._lock:
+            self._waiting.clear()
+        for job_id in ids:
+            self._finish(job_id, None, str(error), 0.0, 1)
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            running = sum(len(ids) for ids in self._busy.values())
+            queued = len(self._waiting)
+        return {
+            "workers": self.workers,
+            "ready_workers": len(self._ready),
+            "threads_per_worker": self.threads_per_worker,
+            "queue_depth": queued,
+            "running": running,
+            "completed": self._completed,
+            "errors": self._errors,
+            "wait_p50_seconds": percentile(waits, 0.50),
+            "wait_p95_seconds": percentile(waits, 0.95),
+            "avg_batch_size": self._batched_jobs / self._batches if self._batches else 1.0,
+        }